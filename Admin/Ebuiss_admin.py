@@ -1,20 +1,31 @@
 # ファイル例: Ebuiss_admin/ebuiss_admin.py
 
+import numpy as np
 import pandas as pd
 from ..backtester.backtester import Backtester
+from ..backtester.incremental import IncrementalBacktester
+from ..backtester.walkforward import rolling_windows, walk_forward_metrics
 from ..evaluator.evaluator import Evaluator
-from ..visualizer.visualizer import Visualizer
 from ..ebuissdb.ebuissdb import EbuissDB
 from ..strategy_driver.strategy_driver import StrategyDriver
-from IPython.display import display
+from ..profiling.profiler import Profiler
+from ..diagnostics.diagnostics import FactorDiagnostics, factor_diagnostics
+from ..significance.significance import SignificanceResult, resampling_test
+from .batch import run_grid, run_windows
+from .panel import PanelCache, normalize_dates
 
 class Ebuiss:
-    def __init__(self):
+    def __init__(self, profiler: Profiler = None):
         """
         EbuissDBとStrategyDriverを内部に保持し、データ・戦略・バックテスト管理を統括する。
+
+        Parameters:
+            profiler (Profiler, optional): 各工程の時間・メモリを記録する Profiler（未指定なら新規作成）
         """
         self.db = EbuissDB()
         self.strategy_driver = StrategyDriver()
+        self.panels = PanelCache(self.db)
+        self.profiler = profiler or Profiler()
 
         self.backtester = None
         self.evaluator = None
@@ -23,6 +34,7 @@ class Ebuiss:
         self.trade_log = None
         self.metrics = None
         self.chart = None
+        self.profile = None  # 直近の実行の工程ごとの記録
 
     ## --- DB操作 ---
 
@@ -35,8 +47,35 @@ class Ebuiss:
     def register_df(self, df: pd.DataFrame, name: str):
         """
         株価DataFrameをDBに登録する。
+        インデックスは登録時に昇順のDatetimeIndexへそろえる。
+        """
+        self.db.register(name, normalize_dates(df))
+
+    def append_df(self, df: pd.DataFrame, name: str):
+        """
+        登録済みの株価DataFrameに新しい日付の行を追加する。
+        """
+        self.db.append(name, normalize_dates(df))
+
+    def append_factors(self, df: pd.DataFrame, prefix: str):
+        """
+        登録済みのファクターに新しい日付の行を追加する。
+        """
+        self.db.append_factors(df, prefix)
+
+    def load_files(self, source, max_workers: int = None, **read_kwargs) -> pd.DataFrame:
+        """
+        ディレクトリ・globパターンのファイルを並行に読み込み、ファイル名をデータ名としてDBに登録する。
+        ファイルごとの読み込み時間・エラーを返す。
+        """
+        return self.db.load_many(source, max_workers=max_workers, **read_kwargs)
+
+    def load_factor_files(self, source, max_workers: int = None, **read_kwargs) -> pd.DataFrame:
+        """
+        ディレクトリ・globパターンのファクターファイルを並行に読み込み、ファイル名をprefixとしてファクター登録する。
+        ファイルごとの読み込み時間・エラーを返す。
         """
-        self.db.register(name, df)
+        return self.db.load_factor_files(source, max_workers=max_workers, **read_kwargs)
 
     def list_factors(self) -> pd.DataFrame:
         """
@@ -50,6 +89,19 @@ class Ebuiss:
         """
         return self.db.datatable()
 
+    def save_db(self, path: str):
+        """
+        DBに登録されているデータ・ファクターを永続ストアに保存する。
+        """
+        self.db.save_store(path)
+
+    def open_db(self, path: str):
+        """
+        永続ストアを開き、現在のDBと置き換える（数値データはメモリマップで参照する）。
+        """
+        self.db = EbuissDB.open_store(path)
+        self.panels = PanelCache(self.db)
+
     ## --- Strategy管理 ---
 
     def register_strategy(self, file_path: str, strategy_name: str):
@@ -72,7 +124,7 @@ class Ebuiss:
 
     ## --- Backtester操作 ---
 
-    def run_backtest(self, price_name: str, strategy_name: str, factor_name: str = None, start_date: str = None, end_date: str = None):
+    def run_backtest(self, price_name: str, strategy_name: str, factor_name: str = None, start_date: str = None, end_date: str = None, engine: str = "auto"):
         """
         DBとStrategyDriverから必要な情報を取得して、バックテストを実行する。
 
@@ -82,73 +134,245 @@ class Ebuiss:
             factor_name (str, optional): ファクターデータ名（未指定ならNone）
             start_date (str, optional): バックテスト開始日
             end_date (str, optional): バックテスト終了日
+            engine (str): Backtesterのエンジン（"auto" なら連続値のウェイトを返す戦略は "weights"、それ以外は "vectorized"）
         """
-        # データ取得
-        price_df = self.db.get(price_name)
-        factor_df = self.db.get_factor(factor_name) if factor_name else None
-
-        # インデックスをDatetimeIndexに変換
-        price_df.index = pd.to_datetime(price_df.index)
-
-        if factor_df is not None:
-            factor_df.index = pd.to_datetime(factor_df.index)
-
-        # 日付フィルタリング
-        if start_date:
-            price_df = price_df[price_df.index >= pd.to_datetime(start_date)]
-            if factor_df is not None:
-                factor_df = factor_df[factor_df.index >= pd.to_datetime(start_date)]
-
-        if end_date:
-            price_df = price_df[price_df.index <= pd.to_datetime(end_date)]
-            if factor_df is not None:
-                factor_df = factor_df[factor_df.index <= pd.to_datetime(end_date)]
-
-        # 日付の共通部分に揃える
-        if factor_df is not None:
-            common_dates = price_df.index.intersection(factor_df.index)
-            price_df = price_df.loc[common_dates]
-            factor_df = factor_df.loc[common_dates]
-
-        # 銘柄の共通部分に揃える
-        if factor_df is not None:
-            common_cols = price_df.columns.intersection(factor_df.columns)
-            if common_cols.empty:
-                raise ValueError("price_dfとfactor_dfに共通する銘柄が存在しません。")
-            price_df = price_df[common_cols]
-            factor_df = factor_df[common_cols]
-
-        # 戦略クラスをロード
-        self.strategy = self.strategy_driver.load_strategy(strategy_name)
+        with self.profiler.run(strategy_name):
+            # 期間・日付・銘柄をそろえたデータと対数リターンを取得（キャッシュ済みなら再利用）
+            panel = self.panels.get(price_name, factor_name, start_date=start_date, end_date=end_date, profiler=self.profiler)
+
+            # 戦略クラスをロード
+            with self.profiler.stage("load_strategy"):
+                self.strategy = self.strategy_driver.load_strategy(strategy_name)
+
+            # Backtesterインスタンス作成・実行
+            self.backtester = Backtester(
+                strategy=self.strategy,
+                price_df=panel.price_df,
+                factor_df=panel.factor_df,
+                exe_cost=self.exe_cost,
+                initial_cash=self.initial_cash,
+                engine=engine,
+                returns_df=panel.returns_df,
+                profiler=self.profiler
+            )
+
+            self.backtester.run()
+            self.trade_log = self.backtester.get_trade_log()
+        self.profile = self.profiler.last_run()
+
+
+    def run_grid(self, strategy_names, price_name: str, factor_names: list = None, params: dict = None, exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None, segment: str = "long_short_ret", engine: str = "auto", max_workers: int = None) -> pd.DataFrame:
+        """
+        戦略 × ファクター × パラメータの組み合わせをプロセスプールで並列にバックテストし、
+        1組み合わせ1行の評価指標テーブルを返す。チャートの作成・表示は行わない。
+
+        Parameters:
+            strategy_names (str or list): 使用する戦略名（のリスト）
+            price_name (str): 使用する価格データ名
+            factor_names (list, optional): 使用するファクター名のリスト（未指定なら登録済みの全ファクター）
+            params (dict, optional): 戦略の引数名 → 候補値リスト 例: {"n_quantiles": [5, 10]}
+            exe_cost (float): 売買コスト率
+            initial_cash (int): 初期資金
+            start_date (str, optional): バックテスト開始日
+            end_date (str, optional): バックテスト終了日
+            segment (str): 結果に載せるセグメント（buy_ret, sell_ret, neutral_ret, long_short_ret）
+            engine (str): Backtesterのエンジン（"auto" なら連続値のウェイトを返す戦略は "weights"、それ以外は "vectorized"）
+            max_workers (int, optional): ワーカープロセス数（未指定ならCPU数）
+        Returns:
+            pd.DataFrame: strategy, factor, 各パラメータ, periods, 評価指標, final_cash, error を列に持つテーブル
+            （ワーカーでの各工程の時間・メモリは self.profiler に取り込まれ、self.profiler.summary() で集計できる）
+        """
+        return run_grid(
+            self.db, self.strategy_driver, strategy_names, price_name,
+            factor_names=factor_names, params=params,
+            exe_cost=exe_cost, initial_cash=initial_cash,
+            start_date=start_date, end_date=end_date,
+            segment=segment, engine=engine, max_workers=max_workers, panels=self.panels, profiler=self.profiler
+        )
+
+    def run_walk_forward(self, strategy_name: str, price_name: str, factor_name: str = None, windows: list = None, window: int = None, step: int = None, expanding: bool = False, refit: bool = False, exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None, segment: str = "long_short_ret", params: dict = None, engine: str = "auto", max_workers: int = None) -> pd.DataFrame:
+        """
+        ウォークフォワード（複数期間）のバックテストを実行し、1期間1行の評価指標テーブルを返す。
+        refit=False の場合は全期間で1回だけポジションを生成し、各期間の指標は累積和・累積積の差分から計算する。
+        refit=True の場合は期間ごとに戦略をロードし直して、プロセスプールで並列に個別実行する。
+
+        Parameters:
+            strategy_name (str): 使用する戦略名
+            price_name (str): 使用する価格データ名
+            factor_name (str, optional): 使用するファクターデータ名
+            windows (list, optional): (start_date, end_date) のリスト（未指定なら window/step から作成）
+            window (int, optional): 1期間の日数（windows 未指定時に必須）
+            step (int, optional): 期間をずらす日数（未指定なら window）
+            expanding (bool): Trueなら開始日を固定して期間を伸ばしていく
+            refit (bool): 期間ごとに戦略を個別実行するか
+            exe_cost (float): 売買コスト率
+            initial_cash (int): 初期資金
+            start_date (str, optional): 全体の開始日
+            end_date (str, optional): 全体の終了日
+            segment (str): 結果に載せるセグメント（buy_ret, sell_ret, neutral_ret, long_short_ret）
+            params (dict, optional): 戦略コンストラクタ引数
+            engine (str): Backtesterのエンジン（"auto" は run_backtest と同じ。refit=False の場合は "vectorized" / "loop" で実行される戦略のみ）
+            max_workers (int, optional): refit=True の場合のワーカープロセス数
+        Returns:
+            pd.DataFrame: window_start, window_end, periods（期間内の取引日数）, 評価指標, final_cash を列に持つテーブル
+            （refit=True の場合は error 列も持つ）
+        """
+        panel = self.panels.get(price_name, factor_name, start_date=start_date, end_date=end_date)
+        if windows is None:
+            if window is None:
+                raise ValueError("windows または window を指定してください。")
+            windows = rolling_windows(panel.price_df.index, window, step=step, expanding=expanding)
+
+        if refit:
+            return run_windows(
+                self.db, self.strategy_driver, strategy_name, price_name, windows,
+                factor_name=factor_name, params=params,
+                exe_cost=exe_cost, initial_cash=initial_cash,
+                segment=segment, engine=engine, max_workers=max_workers, panels=self.panels, profiler=self.profiler
+            )
+
+        with self.profiler.run(strategy_name):
+            with self.profiler.stage("load_strategy"):
+                strategy = self.strategy_driver.load_strategy(strategy_name, **(params or {}))
+            backtester = Backtester(
+                strategy=strategy,
+                price_df=panel.price_df,
+                factor_df=panel.factor_df,
+                exe_cost=exe_cost,
+                initial_cash=initial_cash,
+                engine=engine,
+                returns_df=panel.returns_df,
+                profiler=self.profiler
+            )
+            backtester.run()
+            with self.profiler.stage("walk_forward_metrics"):
+                return walk_forward_metrics(backtester, windows, segment=segment)
+
+    def run_diagnostics(self, price_name: str, factor_names: list = None, horizon: int = 1, n_quantiles: int = 5, start_date: str = None, end_date: str = None, memory_budget: int = 512 * 1024 ** 2) -> FactorDiagnostics:
+        """
+        バックテストを行わずに、複数のファクター（シフト版を含む）のICと分位リターンを一括で計算する。
+
+        Parameters:
+            price_name (str): 使用する価格データ名
+            factor_names (list, optional): 対象のファクター名（未指定なら登録済みの全ファクター）
+            horizon (int): フォワードリターンの期間
+            n_quantiles (int): 分位数
+            start_date (str, optional): 開始日
+            end_date (str, optional): 終了日
+            memory_budget (int): 作業用メモリの上限（バイト、目安）
+        Returns:
+            FactorDiagnostics: ic（日付 × ファクター）, quantile_returns, summary（ファクターごとの集計）
+        """
+        if factor_names is None:
+            factor_names = list(self.db.factor_dict.keys())
+        prices = self.panels.get(price_name, start_date=start_date, end_date=end_date).price_df
+        return factor_diagnostics(prices, self.db.get_factor, factor_names, horizon=horizon, n_quantiles=n_quantiles, memory_budget=memory_budget)
 
-        # Backtesterインスタンス作成・実行
-        self.backtester = Backtester(
-            strategy=self.strategy,
-            price_df=price_df,
-            factor_df=factor_df,
-            exe_cost=self.exe_cost,
-            initial_cash=self.initial_cash
+    def run_significance(self, strategy_name: str, price_name: str, factor_name: str = None, method: str = "permute", n_resamples: int = 1000, block_size: int = None, metrics: list = None, alpha: float = 0.05, seed: int = None, exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None, params: dict = None, max_workers: int = None) -> SignificanceResult:
+        """
+        バックテストを1回実行し、その評価指標の p値と信頼区間をリサンプリングで計算する（resampling_test を参照）。
+        method="permute" では、ファクターが有効な銘柄の間で日付ごとにポジションを並べ替える。
+
+        Parameters:
+            strategy_name (str): 使用する戦略名
+            price_name (str): 使用する価格データ名
+            factor_name (str, optional): 使用するファクターデータ名
+            method (str): 帰無分布の作り方（"permute": 横断面の順位のシャッフル, "bootstrap": リターンのブロック・ブートストラップ）
+            n_resamples (int): 試行回数
+            block_size (int, optional): ブートストラップのブロック長
+            metrics (list, optional): p値・信頼区間を求める指標（未指定なら ann.Ret, R/R, Calmar Ratio）
+            alpha (float): 信頼区間の有意水準
+            seed (int, optional): 乱数シード（同じシードなら並列数によらず同じ結果）
+            exe_cost (float): 売買コスト率
+            initial_cash (int): 初期資金
+            start_date (str, optional): バックテスト開始日
+            end_date (str, optional): バックテスト終了日
+            params (dict, optional): 戦略コンストラクタ引数
+            max_workers (int, optional): ワーカープロセス数（未指定ならCPU数）
+        Returns:
+            SignificanceResult: table（Evaluator の評価表 + p値・信頼区間の列）, null_metrics, bootstrap_metrics
+        """
+        panel = self.panels.get(price_name, factor_name, start_date=start_date, end_date=end_date)
+        strategy = self.strategy_driver.load_strategy(strategy_name, **(params or {}))
+        backtester = Backtester(
+            strategy=strategy,
+            price_df=panel.price_df,
+            factor_df=panel.factor_df,
+            exe_cost=exe_cost,
+            initial_cash=initial_cash,
+            returns_df=panel.returns_df
+        )
+        backtester.run()
+
+        positions = backtester.get_positions()
+        ret = panel.returns_df.reindex(index=positions.index, columns=positions.columns).to_numpy(dtype=float)
+        eligible = ~np.isnan(ret)
+        if panel.factor_df is not None:
+            eligible &= panel.factor_df.reindex(index=positions.index, columns=positions.columns).notna().to_numpy()
+
+        return resampling_test(
+            np.nan_to_num(positions.to_numpy(dtype=float, na_value=np.nan), nan=0.0), ret,
+            eligible=eligible, method=method, n_resamples=n_resamples, block_size=block_size,
+            metrics=metrics, alpha=alpha, seed=seed, max_workers=max_workers
         )
 
-        self.backtester.run()
-        self.trade_log = self.backtester.get_trade_log()
+    def run_incremental(self, strategy_name: str, price_name: str, factor_name: str = None, state: IncrementalBacktester = None, exe_cost: float = 0.000, initial_cash: int = 1_000_000, lookback: int = 0) -> IncrementalBacktester:
+        """
+        前回の実行状態から、新しく追加された日付だけバックテストを進める。
+        state を指定しない場合は全期間を実行して状態を作成する。結果は全期間を再実行した場合と同じになる。
 
+        Parameters:
+            strategy_name (str): 使用する戦略名
+            price_name (str): 使用する価格データ名
+            factor_name (str, optional): 使用するファクターデータ名
+            state (IncrementalBacktester, optional): 前回の実行状態（IncrementalBacktester.load で復元したものなど）
+            exe_cost (float): 売買コスト率（新規作成時のみ使用）
+            initial_cash (int): 初期資金（新規作成時のみ使用）
+            lookback (int): ポジション生成に使う直近の日数（新規作成時のみ使用）
+        Returns:
+            IncrementalBacktester: 更新後の状態（metrics と、今回追加された trade_log の行は self にも保存する。
+                状態は trade_log を保持しないため、全期間の trade_log が必要な場合は各回の self.trade_log を保存しておく）
+        """
+        self.strategy = self.strategy_driver.load_strategy(strategy_name)
+        if state is None:
+            state = IncrementalBacktester(exe_cost=exe_cost, initial_cash=initial_cash, lookback=lookback, strategy_name=self.strategy.name)
+
+        if state.last_date is None:
+            price_df = normalize_dates(self.db.get(price_name))
+            factor_df = normalize_dates(self.db.get_factor(factor_name)) if factor_name else None
+        else:
+            # 前回より後の日付だけを取り出す（追加した行だけを読み、登録済みデータ全体は結合・整列しない）
+            price_df = normalize_dates(self.db.get_after(price_name, state.last_date))
+            factor_df = None
+            if factor_name:
+                factor_df = self.db.get_factor(factor_name)
+                factor_df = normalize_dates(factor_df.iloc[factor_df.index.searchsorted(state.last_date, side="right"):])
+        self.trade_log = state.update(self.strategy, price_df, factor_df)
+        self.metrics = state.evaluate()
+        return state
 
     def evaluate_result(self):
         """
         評価を実行し、metricsを保存する。
         """
-        self.evaluator = Evaluator(self.trade_log, strategy_name=self.strategy.name)
-        self.metrics = self.evaluator.evaluate()
+        with self.profiler.stage("evaluate"):
+            self.evaluator = Evaluator(self.trade_log, strategy_name=self.strategy.name)
+            self.metrics = self.evaluator.evaluate()
+        self.profile = self.profiler.last_run()
 
-    def visualize_result(self, cumulative=True):
+    def visualize_result(self, cumulative=True, max_points: int = None):
         """
         可視化を実行し、チャートを保存する。
+        max_points を指定した場合は各セグメントをその点数以下に間引いて WebGL で描画する。
         """
-        self.visualizer = Visualizer(self.trade_log, strategy_name=self.strategy.name)
-        self.chart = self.visualizer.plot_equity_segments(cumulative=cumulative)
+        with self.profiler.stage("chart"):
+            from ..visualizer.visualizer import Visualizer  # plotly は描画するときだけ読み込む
+
+            self.visualizer = Visualizer(self.trade_log, strategy_name=self.strategy.name)
+            self.chart = self.visualizer.plot_equity_segments(cumulative=cumulative, max_points=max_points)
+        self.profile = self.profiler.last_run()
 
-    def run(self, strategy_name: str, price_name: str, factor_name: str = None, cumulative: bool = True, exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None):
+    def run(self, strategy_name: str, price_name: str, factor_name: str = None, cumulative: bool = True, exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None, engine: str = "auto"):
         """
         戦略名、価格データ名、ファクターデータ名を指定して一括実行。
 
@@ -157,15 +381,19 @@ class Ebuiss:
             price_name (str): 使用する価格データ名
             factor_name (str, optional): 使用するファクターデータ名（未指定ならNone）
             cumulative (bool): 資産推移を累積表示するか
-            exe_cost (float): 売買コスト率
+            exe_cost (float or pd.Series): 売買コスト率（銘柄ごとのコスト率は engine="holdings" / "weights" のみ）
             initial_cash (int): 初期資金
+            engine (str): Backtesterのエンジン（"auto" なら連続値のウェイトを返す戦略は "weights"、それ以外は "vectorized"）
         Returns:
             trade_log, metrics, chart
+            （各工程の時間・メモリは self.profile、実行をまたいだ集計は self.profiler.summary() で確認できる）
         """
+        from IPython.display import display  # IPython はノートブックで表示するときだけ読み込む
+
         self.exe_cost = exe_cost
         self.initial_cash = initial_cash
 
-        self.run_backtest(price_name=price_name, strategy_name=strategy_name, factor_name=factor_name, start_date=start_date, end_date=end_date)
+        self.run_backtest(price_name=price_name, strategy_name=strategy_name, factor_name=factor_name, start_date=start_date, end_date=end_date, engine=engine)
         self.evaluate_result()
         self.visualize_result(cumulative=cumulative)
 
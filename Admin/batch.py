@@ -0,0 +1,319 @@
+# ファイル例: Ebuiss_admin/batch.py
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ..backtester.backtester import Backtester
+from ..evaluator.evaluator import Evaluator
+from ..profiling.profiler import Profiler, profile_stage
+from .panel import PanelCache, align_panel
+
+
+@dataclass
+class SharedFrame:
+    """
+    数値DataFrameの値を共有メモリに置き、ワーカープロセスからコピーせずに参照するためのハンドル。
+    ワーカーへはこのハンドル（共有メモリ名とindex/columns）だけがpickleされる。
+    """
+    shm_name: str
+    shape: tuple
+    dtype: str
+    index: pd.Index
+    columns: pd.Index
+
+    @classmethod
+    def create(cls, df: pd.DataFrame):
+        """
+        DataFrameの値を新しい共有メモリにコピーし、(ハンドル, SharedMemory) を返す。
+        SharedMemoryは呼び出し側で close() / unlink() すること。
+        """
+        values = np.ascontiguousarray(df.to_numpy(dtype=float))
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+
+        handle = cls(shm_name=shm.name, shape=values.shape, dtype=values.dtype.str, index=df.index, columns=df.columns)
+        return handle, shm
+
+    def attach(self):
+        """
+        共有メモリに接続し、読み取り専用の配列を参照する (DataFrame, SharedMemory) を返す。
+        """
+        shm = shared_memory.SharedMemory(name=self.shm_name)
+        values = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+        values.flags.writeable = False
+
+        df = pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+        return df, shm
+
+
+# ワーカープロセスごとの状態（共有価格データ・対数リターン・StrategyDriver）
+_worker_state = {}
+
+
+def _share_prices(db, price_name: str, panels: PanelCache = None) -> tuple:
+    """
+    価格データと対数リターンを親プロセスで1回だけ用意し、それぞれ共有メモリに置く。
+
+    Returns:
+        (list, list): ワーカーに渡すハンドル [価格, 対数リターン] と、呼び出し側で close() / unlink() する SharedMemory
+    """
+    prices, log_returns = (panels or PanelCache(db)).get_prices(price_name)
+    handles, shms = [], []
+    try:
+        for df in (prices, log_returns):
+            handle, shm = SharedFrame.create(df)
+            handles.append(handle)
+            shms.append(shm)
+    except Exception:
+        _release(shms)
+        raise
+    return handles, shms
+
+
+def _release(shms: list):
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+
+def _init_worker(price_handle: SharedFrame, returns_handle: SharedFrame, strategy_driver):
+    prices, price_shm = price_handle.attach()
+    log_returns, returns_shm = returns_handle.attach()
+    _worker_state["prices"] = prices
+    _worker_state["log_returns"] = log_returns
+    _worker_state["shm"] = (price_shm, returns_shm)  # 参照を保持して共有メモリを開いたままにする
+    _worker_state["strategy_driver"] = strategy_driver
+
+
+def _run_combinations(factor_name: Optional[str], factor_df: Optional[pd.DataFrame], combinations: list, settings: dict) -> tuple:
+    """
+    1つのファクターに対して (組み合わせ番号, 戦略名, パラメータ) のリストを順に実行し、
+    組み合わせごとの結果行を返す。失敗した組み合わせは error 列に理由を記録する。
+    各工程の時間・メモリはワーカー内の Profiler に記録し、親プロセスで集計できるよう記録も返す。
+
+    Returns:
+        (list, list): 結果行と、工程ごとの記録（Profiler.records の形式、1組み合わせ1実行）
+    """
+    strategy_driver = _worker_state["strategy_driver"]
+    profiler = Profiler(trace_memory=settings["trace_memory"], max_records=None)
+    try:
+        with profiler.run(f"align:{factor_name}"), profiler.stage("align"):
+            panel = align_panel(
+                _worker_state["prices"], _worker_state["log_returns"], factor_df,
+                start_date=settings["start_date"], end_date=settings["end_date"]
+            )
+        align_error = None
+    except Exception as e:
+        align_error = e
+
+    rows = []
+    for combo_id, strategy_name, params in combinations:
+        row = {"combo_id": combo_id, "strategy": strategy_name, "factor": factor_name, **params}
+        try:
+            if align_error is not None:
+                raise align_error
+            with profiler.run(f"{strategy_name}:{factor_name}"):
+                with profiler.stage("load_strategy"):
+                    strategy = strategy_driver.load_strategy(strategy_name, **params)
+                backtester = Backtester(
+                    strategy=strategy,
+                    price_df=panel.price_df,
+                    factor_df=panel.factor_df,
+                    exe_cost=settings["exe_cost"],
+                    initial_cash=settings["initial_cash"],
+                    engine=settings["engine"],
+                    returns_df=panel.returns_df,
+                    profiler=profiler
+                )
+                backtester.run()
+                trade_log = backtester.get_trade_log()
+                with profiler.stage("evaluate"):
+                    metrics = Evaluator(trade_log, strategy_name=strategy.name).evaluate()
+
+            row["periods"] = len(trade_log)
+            row.update(metrics.loc[settings["segment"]].to_dict())
+            row["final_cash"] = trade_log["cash"].iloc[-1]
+            row["error"] = None
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+        rows.append(row)
+
+    return rows, list(profiler.records)
+
+
+def run_grid(db, strategy_driver, strategy_names, price_name: str, factor_names=None, params: dict = None,
+             exe_cost: float = 0.000, initial_cash: int = 1_000_000, start_date: str = None, end_date: str = None,
+             segment: str = "long_short_ret", engine: str = "auto", max_workers: int = None,
+             panels: PanelCache = None, profiler: Profiler = None) -> pd.DataFrame:
+    """
+    戦略 × ファクター × パラメータの全組み合わせをプロセスプールで並列にバックテストする。
+    価格データと対数リターンは親プロセスで1回だけ用意して共有メモリ経由でワーカーに渡し、ファクターはファクターごとに1回だけ送る。
+    チャートは作成しない。
+
+    Parameters:
+        db (EbuissDB): 価格データ・ファクターを保持するDB
+        strategy_driver (StrategyDriver): 戦略のロードに使うドライバ
+        strategy_names (str or list): 戦略名（のリスト）
+        price_name (str): 価格データ名
+        factor_names (list, optional): ファクター名のリスト（未指定なら登録済みの全ファクター、ファクターなしはNone）
+        params (dict, optional): 戦略コンストラクタ引数名 → 候補値リスト（全組み合わせを実行）
+        exe_cost (float): 売買コスト率
+        initial_cash (int): 初期資金
+        start_date (str, optional): バックテスト開始日
+        end_date (str, optional): バックテスト終了日
+        segment (str): 結果表に載せるEvaluatorのセグメント
+        engine (str): Backtesterのエンジン（"auto" なら戦略が返すポジションの値から決める）
+        max_workers (int, optional): ワーカープロセス数（未指定ならCPU数）
+        panels (PanelCache, optional): 価格データと対数リターンの取得に使うキャッシュ
+        profiler (Profiler, optional): 指定した場合、各ワーカーの工程ごとの記録（1組み合わせ1実行）を取り込む
+
+    Returns:
+        pd.DataFrame: 1組み合わせ1行の結果表（strategy, factor, 各パラメータ, periods, 評価指標, final_cash, error）
+    """
+    if isinstance(strategy_names, str):
+        strategy_names = [strategy_names]
+    if factor_names is None:
+        factor_names = list(db.factor_dict.keys())
+    params = params or {}
+
+    param_names = list(params.keys())
+    param_grid = [dict(zip(param_names, values)) for values in itertools.product(*params.values())]
+    strategy_grid = list(itertools.product(strategy_names, param_grid))
+    if not factor_names or not strategy_grid:
+        return pd.DataFrame()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    settings = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "exe_cost": exe_cost,
+        "initial_cash": initial_cash,
+        "segment": segment,
+        "engine": engine,
+        "trace_memory": profiler is not None and profiler.trace_memory,  # ワーカーの Profiler も同じ設定で計測する
+    }
+
+    # ファクター数がワーカー数より少ない場合は、組み合わせを分割して全ワーカーを使う
+    n_chunks = max(1, math.ceil(max_workers / len(factor_names)))
+    chunk_size = math.ceil(len(strategy_grid) / n_chunks)
+
+    with profile_stage(profiler, "share_prices"):
+        handles, shms = _share_prices(db, price_name, panels)
+
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(*handles, strategy_driver)) as executor:
+            futures = []
+            for i, factor_name in enumerate(factor_names):
+                factor_df = db.get_factor(factor_name) if factor_name else None
+                for start in range(0, len(strategy_grid), chunk_size):
+                    combinations = [
+                        (i * len(strategy_grid) + j, strategy_name, combo_params)
+                        for j, (strategy_name, combo_params) in enumerate(strategy_grid[start:start + chunk_size], start=start)
+                    ]
+                    futures.append(executor.submit(_run_combinations, factor_name, factor_df, combinations, settings))
+
+            for future in futures:
+                future_rows, records = future.result()
+                rows.extend(future_rows)
+                if profiler is not None:
+                    profiler.add_records(records)
+    finally:
+        _release(shms)
+
+    result = pd.DataFrame(rows).sort_values("combo_id").drop(columns="combo_id")
+    return result.reset_index(drop=True)
+
+
+def _run_windows(factor_name: Optional[str], factor_df: Optional[pd.DataFrame], strategy_name: str, params: dict, windows: list, settings: dict) -> list:
+    """
+    (期間番号, 開始日, 終了日) のリストを順に実行し、期間ごとの結果行を返す。
+    期間ごとに戦略をロードし直すため、期間内のデータで戦略を学習し直す場合にも使える。
+    """
+    rows, records = [], []
+    for window_id, start_date, end_date in windows:
+        window_settings = {**settings, "start_date": start_date, "end_date": end_date}
+        window_rows, window_records = _run_combinations(factor_name, factor_df, [(window_id, strategy_name, params)], window_settings)
+        row = window_rows[0]
+        row["window_start"] = pd.Timestamp(start_date)
+        row["window_end"] = pd.Timestamp(end_date)
+        rows.append(row)
+        # 期間ごとの記録は実行番号が重ならないよう、期間番号でずらす
+        records.extend({**record, "run_id": (window_id, record["run_id"])} for record in window_records)
+    return rows, records
+
+
+def run_windows(db, strategy_driver, strategy_name: str, price_name: str, windows: list, factor_name: str = None,
+                params: dict = None, exe_cost: float = 0.000, initial_cash: int = 1_000_000,
+                segment: str = "long_short_ret", engine: str = "auto", max_workers: int = None,
+                panels: PanelCache = None, profiler: Profiler = None) -> pd.DataFrame:
+    """
+    1つの戦略をウォークフォワードの各期間で個別にバックテストし、プロセスプールで並列に実行する。
+    価格データと対数リターンは共有メモリ経由でワーカーに渡し、ファクターはワーカー数分のチャンクごとに1回だけ送る。
+
+    Parameters:
+        db (EbuissDB): 価格データ・ファクターを保持するDB
+        strategy_driver (StrategyDriver): 戦略のロードに使うドライバ
+        strategy_name (str): 戦略名
+        price_name (str): 価格データ名
+        windows (list): (start_date, end_date) のリスト
+        factor_name (str, optional): ファクター名
+        params (dict, optional): 戦略コンストラクタ引数
+        exe_cost (float): 売買コスト率
+        initial_cash (int): 初期資金
+        segment (str): 結果表に載せるEvaluatorのセグメント
+        engine (str): Backtesterのエンジン（"auto" なら戦略が返すポジションの値から決める）
+        max_workers (int, optional): ワーカープロセス数（未指定ならCPU数）
+        panels (PanelCache, optional): 価格データと対数リターンの取得に使うキャッシュ
+        profiler (Profiler, optional): 指定した場合、各ワーカーの工程ごとの記録（1組み合わせ1実行）を取り込む
+
+    Returns:
+        pd.DataFrame: 1期間1行の結果表（window_start, window_end, periods, 評価指標, final_cash, error）
+    """
+    if not windows:
+        return pd.DataFrame()
+    params = params or {}
+    max_workers = max_workers or os.cpu_count() or 1
+    settings = {
+        "exe_cost": exe_cost,
+        "initial_cash": initial_cash,
+        "segment": segment,
+        "engine": engine,
+        "trace_memory": profiler is not None and profiler.trace_memory,  # ワーカーの Profiler も同じ設定で計測する
+    }
+
+    indexed = [(i, start, end) for i, (start, end) in enumerate(windows)]
+    chunk_size = math.ceil(len(indexed) / max_workers)
+
+    with profile_stage(profiler, "share_prices"):
+        handles, shms = _share_prices(db, price_name, panels)
+    factor_df = db.get_factor(factor_name) if factor_name else None
+
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(*handles, strategy_driver)) as executor:
+            futures = [
+                executor.submit(_run_windows, factor_name, factor_df, strategy_name, params, indexed[start:start + chunk_size], settings)
+                for start in range(0, len(indexed), chunk_size)
+            ]
+            for future in futures:
+                future_rows, records = future.result()
+                rows.extend(future_rows)
+                if profiler is not None:
+                    profiler.add_records(records)
+    finally:
+        _release(shms)
+
+    result = pd.DataFrame(rows).sort_values("combo_id").drop(columns=["combo_id", "strategy", "factor", *params.keys()])
+    front = ["window_start", "window_end"]
+    return result[front + [c for c in result.columns if c not in front]].reset_index(drop=True)
@@ -0,0 +1,159 @@
+# ファイル例: Ebuiss_admin/panel.py
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ..profiling.profiler import profile_stage
+
+
+def normalize_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    インデックスを昇順のDatetimeIndexにそろえる。すでにそろっていれば同じオブジェクトを返す。
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        df = df.set_axis(pd.to_datetime(df.index), axis=0)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
+
+
+def date_slice(index: pd.DatetimeIndex, start_date=None, end_date=None) -> slice:
+    """
+    昇順のDatetimeIndexに対して、start_date〜end_date（両端を含む）の位置スライスを二分探索で求める。
+    """
+    start = index.searchsorted(pd.Timestamp(start_date), side="left") if start_date else 0
+    stop = index.searchsorted(pd.Timestamp(end_date), side="right") if end_date else len(index)
+    return slice(start, stop)
+
+
+@dataclass
+class AlignedPanel:
+    """
+    期間・日付・銘柄をそろえた価格データ・ファクターデータと、対応する対数リターン。
+    """
+    price_df: pd.DataFrame
+    factor_df: Optional[pd.DataFrame]
+    returns_df: pd.DataFrame
+
+
+@dataclass
+class _PriceEntry:
+    source: pd.DataFrame  # DBに登録されているDataFrame（差し替え検知用）
+    prices: pd.DataFrame  # 日付を正規化した価格データ
+    log_returns: pd.DataFrame  # 全期間・全銘柄の対数リターン（先頭行はNaN）
+
+
+class PanelCache:
+    """
+    run_backtest 用に、そろえた価格・ファクター・対数リターンをキャッシュする。
+    対数リターンは価格データごとに1回だけ計算し、期間は二分探索による行スライス（コピーなし）で切り出す。
+    DBのデータが再登録された場合は自動的に作り直す。
+    """
+    def __init__(self, db, maxsize: int = 8):
+        """
+        Parameters:
+            db (EbuissDB): データを取得するDB
+            maxsize (int): 保持する (価格, ファクター, 期間) の組み合わせ数
+        """
+        self.db = db
+        self.maxsize = maxsize
+        self._prices = {}
+        self._panels: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def _price_entry(self, price_name: str, source: pd.DataFrame, profiler=None) -> _PriceEntry:
+        entry = self._prices.get(price_name)
+        if entry is None or entry.source is not source:
+            with profile_stage(profiler, "prepare_prices"):
+                prices = normalize_dates(source)
+                log_returns = np.log(prices / prices.shift(1))
+            entry = _PriceEntry(source=source, prices=prices, log_returns=log_returns)
+            self._prices[price_name] = entry
+        return entry
+
+    def get_prices(self, price_name: str, profiler=None) -> tuple:
+        """
+        日付を正規化した全期間の価格データと、その対数リターン（先頭行はNaN）を返す（キャッシュ済みなら再利用）。
+        """
+        entry = self._price_entry(price_name, self.db.get(price_name), profiler=profiler)
+        return entry.prices, entry.log_returns
+
+    def get(self, price_name: str, factor_name: str = None, start_date=None, end_date=None, profiler=None) -> AlignedPanel:
+        """
+        価格データ名・ファクター名・期間に対応する AlignedPanel を返す。
+        結果は Backtester に price_df / factor_df / returns_df としてそのまま渡せる。
+        profiler を指定した場合、DBからの取得・日付の正規化とリターン計算・整列の各工程を記録する。
+        """
+        with profile_stage(profiler, "db_fetch"):
+            source = self.db.get(price_name)
+            factor_source = self.db.get_factor(factor_name) if factor_name else None
+        entry = self._price_entry(price_name, source, profiler=profiler)
+
+        key = (price_name, factor_name, start_date, end_date)
+        cached = self._panels.get(key)
+        if cached is not None and cached[0] is entry and cached[1] is factor_source:
+            self._panels.move_to_end(key)
+            return cached[2]
+
+        with profile_stage(profiler, "align"):
+            panel = align_panel(entry.prices, entry.log_returns, factor_source, start_date, end_date)
+        self._panels[key] = (entry, factor_source, panel)
+        while len(self._panels) > self.maxsize:
+            self._panels.popitem(last=False)
+        return panel
+
+    def clear(self):
+        self._prices.clear()
+        self._panels.clear()
+
+
+def align_panel(prices: pd.DataFrame, log_returns: pd.DataFrame, factor_df: Optional[pd.DataFrame] = None, start_date=None, end_date=None) -> AlignedPanel:
+    """
+    価格データとファクターデータを期間・日付・銘柄でそろえる。
+
+    Parameters:
+        prices (pd.DataFrame): normalize_dates 済みの価格データ
+        log_returns (pd.DataFrame): prices 全体の対数リターン np.log(prices / prices.shift(1))
+        factor_df (pd.DataFrame, optional): ファクターデータ
+        start_date, end_date (optional): バックテスト期間（両端を含む）
+    """
+    window = date_slice(prices.index, start_date, end_date)
+    price_df = prices.iloc[window]
+
+    if factor_df is None:
+        returns_df = log_returns.iloc[window.start + 1:window.stop].dropna()
+        return AlignedPanel(price_df=price_df, factor_df=None, returns_df=returns_df)
+
+    factor_df = normalize_dates(factor_df)
+    factor_df = factor_df.iloc[date_slice(factor_df.index, start_date, end_date)]
+
+    # 日付の共通部分に揃える（同じ日付列なら何もしない）
+    contiguous = True
+    if not factor_df.index.equals(price_df.index):
+        common_dates = price_df.index.intersection(factor_df.index)
+        contiguous = common_dates.equals(price_df.index)
+        price_df = price_df.loc[common_dates] if not contiguous else price_df
+        factor_df = factor_df.loc[common_dates]
+
+    # 銘柄の共通部分に揃える
+    common_cols = price_df.columns.intersection(factor_df.columns)
+    if common_cols.empty:
+        raise ValueError("price_dfとfactor_dfに共通する銘柄が存在しません。")
+    if not common_cols.equals(price_df.columns):
+        price_df = price_df[common_cols]
+    if not common_cols.equals(factor_df.columns):
+        factor_df = factor_df[common_cols]
+
+    # 価格の日付が連続した区間なら、全期間の対数リターンを切り出して再利用する
+    if contiguous:
+        returns_df = log_returns.iloc[window.start + 1:window.stop]
+        if not common_cols.equals(returns_df.columns):
+            returns_df = returns_df[common_cols]
+    else:
+        returns_df = np.log(price_df / price_df.shift(1))
+    returns_df = returns_df.dropna()
+
+    return AlignedPanel(price_df=price_df, factor_df=factor_df, returns_df=returns_df)
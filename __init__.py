@@ -1,6 +1,26 @@
 # Ebuiss/__init__.py
 
-from .backtester.backtester import Backtester
-from .evaluator.evaluator import Evaluator
-from .visualizer.visualizer import Visualizer
-from .Admin.Ebuiss_admin import Ebuiss
+import importlib
+
+# 公開クラス名 → 定義モジュール。属性に最初にアクセスした時点でインポートする
+# （Visualizer の plotly や Ebuiss の IPython を、使わない処理で読み込まないため）
+_LAZY_ATTRS = {
+    "Backtester": ".backtester.backtester",
+    "Evaluator": ".evaluator.evaluator",
+    "Visualizer": ".visualizer.visualizer",
+    "Ebuiss": ".Admin.Ebuiss_admin",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
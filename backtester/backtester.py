@@ -1,44 +1,165 @@
 import pandas as pd
 import numpy as np
 
+from ..profiling.profiler import profile_stage
+from .kernels import holdings_path
+from .weights import positions_to_weights, weight_returns
+
+def segment_returns(pos: np.ndarray, ret: np.ndarray, prev_pos: np.ndarray, cash: float, exe_cost: float) -> dict:
+    """
+    ポジション行列とリターン行列（日付 × 銘柄）から、各日付のセグメント別平均リターン・コスト・資産を一括で計算する。
+
+    Parameters:
+        pos (np.ndarray): ポジション（NaNは0に補完済み）
+        ret (np.ndarray): 対数リターン
+        prev_pos (np.ndarray): 先頭日付の直前のポジション（銘柄数の1次元配列）
+        cash (float): 先頭日付の直前の資産
+        exe_cost (float): 売買コスト率
+
+    Returns:
+        dict: cash, buy_ret, sell_ret, neutral_ret, long_short_ret, cost の各配列（trade_log の列順）
+    """
+    # 各セグメントごとの平均リターン（axis=1 のマスク付き平均）
+    def masked_mean(mask):
+        count = mask.sum(axis=1)
+        total = np.where(mask, ret, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan)
+
+    buy_ret = masked_mean(pos == 1)
+    sell_ret = masked_mean(pos == -1)
+    neutral_ret = masked_mean(pos == 0)
+    long_short_ret = np.nan_to_num(buy_ret - sell_ret, nan=0.0)
+
+    # 売買回数（前日ポジションとの差分）
+    prev = np.vstack([np.asarray(prev_pos, dtype=float).reshape(1, -1), pos[:-1]])
+    num_changes = (pos != prev).sum(axis=1)
+
+    # cost = exe_cost * (前日cash / 銘柄数) * 売買回数 なので、資産は累積積で求まる
+    # 直前の資産から順に掛けていくため、期間を分けて計算しても同じ結果になる
+    n_cols = pos.shape[1]
+    cost_rate = exe_cost * num_changes / n_cols if n_cols > 0 else np.zeros(len(pos))
+    growth = 1 + long_short_ret - cost_rate
+    cash_path = np.cumprod(np.concatenate([[cash], growth]))
+    cost = cash_path[:-1] * cost_rate
+
+    return {
+        "cash": cash_path[1:],
+        "buy_ret": buy_ret,
+        "sell_ret": sell_ret,
+        "neutral_ret": neutral_ret,
+        "long_short_ret": long_short_ret,
+        "cost": cost
+    }
+
+
 class Backtester:
-    def __init__(self, strategy, price_df, factor_df=None, exe_cost=0.001, initial_cash=1_000_000):
+    # engine名 → 実行メソッド名
+    ENGINES = {
+        "vectorized": "_run_vectorized",
+        "loop": "_run_loop",
+        "holdings": "_run_holdings",
+        "weights": "_run_weights",
+    }
+    # 銘柄ごとのコスト率（pd.Series）を扱えるエンジン
+    PER_TICKER_COST_ENGINES = {"holdings", "weights"}
+
+    def __init__(self, strategy, price_df, factor_df=None, exe_cost=0.001, initial_cash=1_000_000, engine="vectorized", returns_df=None, profiler=None, dtype=np.float64):
+        """
+        Parameters:
+            engine (str): バックテストエンジン
+                "vectorized": 全期間の行列をNumPyで一括計算（デフォルト）
+                "loop": 日付ごとにループする参照実装（結果の検証用）
+                "holdings": 銘柄ごとの保有額を追跡し、実際の売買額からコストを計算（Numbaがあれば使用）
+                "weights": generate_positions の値を連続値のウェイトとして扱い、内積でリターン、|Δw| の合計で売買回転率を計算
+                "auto": run() で generate_positions の値を見て決める（-1/0/1 以外の値があれば "weights"、
+                        なければ "vectorized"、銘柄ごとの exe_cost なら "holdings"）。実行後の self.engine は決めたエンジン
+            exe_cost (float or pd.Series): 売買コスト率。"holdings" / "weights" エンジンでは銘柄ごとのコスト率（index=銘柄）も指定できる
+            returns_df (pd.DataFrame, optional): 計算済みの対数リターン（NaN行除去済み）。
+                指定した場合は price_df から計算しない
+            profiler (Profiler, optional): 指定した場合、ポジション生成とバックテストの時間・メモリを記録する
+            dtype: "weights" エンジンの計算に使う浮動小数点型（np.float32 でメモリと時間を削減できる）
+        """
+        if engine != "auto" and engine not in self.ENGINES:
+            raise ValueError(f"engine は {list(self.ENGINES) + ['auto']} のいずれかを指定してください: {engine}")
+        if np.ndim(exe_cost) != 0 and engine not in self.PER_TICKER_COST_ENGINES | {"auto"}:
+            raise ValueError(f"銘柄ごとの exe_cost は engine={sorted(self.PER_TICKER_COST_ENGINES)} でのみ指定できます: {engine}")
+
         self.strategy = strategy
         self.exe_cost = exe_cost
         self.initial_cash = initial_cash
+        self.engine = engine
+        self.auto_engine = engine == "auto"
+        self.profiler = profiler
+        self.dtype = dtype
 
         # 株価データ（そのまま）
         self.prices = price_df
 
         # 対数リターンを計算（そのまま日次 or デイトレード単位）
-        self.returns_df = np.log(self.prices / self.prices.shift(1)).dropna()
+        if returns_df is None:
+            returns_df = np.log(self.prices / self.prices.shift(1)).dropna()
+        self.returns_df = returns_df
 
         # ファクターもそのまま合わせる（もしあれば）
         self.factor_df = (
-            factor_df.loc[self.returns_df.index]
+            self._align_factor(factor_df, self.returns_df.index)
             if factor_df is not None else None
         )
 
 
         self.equity_curve = pd.Series(dtype=float)
+        self.positions_df = None
         self.trade_log = []
 
+    @staticmethod
+    def _align_factor(factor_df: pd.DataFrame, dates: pd.Index) -> pd.DataFrame:
+        # リターンの日付がファクターの末尾と一致する場合（通常は先頭1行だけ欠ける）は行スライスで済ませる
+        offset = len(factor_df) - len(dates)
+        if offset >= 0 and factor_df.index[offset:].equals(dates):
+            return factor_df.iloc[offset:]
+        return factor_df.loc[dates]
+
     def run(self):
         """
         戦略に基づくポジションと、週次対数リターンにより資産推移を計算。
         """
         # 戦略からポジションを取得
-        positions_df = self.strategy.generate_positions(self.prices, self.factor_df)
+        with profile_stage(self.profiler, "generate_positions"):
+            positions_df = self.strategy.generate_positions(self.prices, self.factor_df)
 
         # 銘柄の共通部分だけに整合
         common_cols = self.returns_df.columns.intersection(positions_df.columns)
         positions_df = positions_df[common_cols]
         returns_df = self.returns_df[common_cols]
 
+        # リターンが存在する日付のポジションを保持（ウォークフォワード評価などで再利用）
+        self.positions_df = positions_df[positions_df.index.isin(returns_df.index)]
+
+        if self.auto_engine:
+            self.engine = self._select_engine(positions_df)
+
+        self.trade_log = []
+        with profile_stage(self.profiler, "backtest"):
+            getattr(self, self.ENGINES[self.engine])(positions_df, returns_df)
+
+    def _select_engine(self, positions_df: pd.DataFrame) -> str:
+        # engine="auto"：-1/0/1 以外の値があれば連続値のウェイトとみなす
+        values = positions_df.to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if not np.isin(values, (-1.0, 0.0, 1.0)).all():
+            return "weights"
+        return "vectorized" if np.ndim(self.exe_cost) == 0 else "holdings"
+
+    def _run_loop(self, positions_df: pd.DataFrame, returns_df: pd.DataFrame):
+        """
+        日付ごとにループして資産推移を計算する参照実装。
+        """
         # 初期化
         cash = self.initial_cash
         equity_list = []
-        prev_pos = pd.Series(0, index=common_cols)
+        equity_dates = []
+        prev_pos = pd.Series(0, index=positions_df.columns)
 
         for date in positions_df.index:
             if date not in returns_df.index:
@@ -61,6 +182,7 @@ class Backtester:
             # 資産更新
             cash = cash * (1 + long_short_ret) - cost
             equity_list.append(cash)
+            equity_dates.append(date)
             prev_pos = pos.copy()
 
             self.trade_log.append({
@@ -73,11 +195,91 @@ class Backtester:
                 "cost": cost
             })
 
-        self.equity_curve = pd.Series(equity_list, index=positions_df.index)
+        self.equity_curve = pd.Series(equity_list, index=pd.Index(equity_dates, dtype=positions_df.index.dtype), dtype=float)
+
+    def _run_vectorized(self, positions_df: pd.DataFrame, returns_df: pd.DataFrame):
+        """
+        ポジション行列とリターン行列をNumPy配列として全期間一括で計算する。
+        結果は _run_loop と同じ trade_log / equity_curve になる。
+        """
+        # リターンが存在する日付だけを、ポジションの日付順のまま残す
+        positions_df = positions_df[positions_df.index.isin(returns_df.index)]
+        dates = positions_df.index
+
+        pos = positions_df.to_numpy(dtype=float, na_value=np.nan)
+        pos = np.nan_to_num(pos, nan=0.0)  # NaN補完
+        ret = returns_df.reindex(dates).to_numpy(dtype=float)
+
+        result = segment_returns(pos, ret, np.zeros(pos.shape[1]), self.initial_cash, self.exe_cost)
+
+        self.trade_log = pd.DataFrame({"date": dates, **result})
+        self.equity_curve = pd.Series(result["cash"], index=dates, dtype=float)
+
+    def _run_holdings(self, positions_df: pd.DataFrame, returns_df: pd.DataFrame):
+        """
+        銘柄ごとの保有額を追跡して、実際の売買額 × コスト率でコストを計算する。
+        ロング銘柄に資産を均等に、ショート銘柄に資産を均等に（売りで）配分し、毎期その比率にリバランスする。
+        保有額の値動きと損益は対数リターンを単純リターンに変換して計算する。
+        セグメント別の平均リターンは _run_vectorized と同じで、cash / cost と売買額（turnover）だけが異なる。
+        """
+        positions_df = positions_df[positions_df.index.isin(returns_df.index)]
+        dates = positions_df.index
+
+        pos = np.nan_to_num(positions_df.to_numpy(dtype=float, na_value=np.nan), nan=0.0)
+        ret = returns_df.reindex(dates).to_numpy(dtype=float)
+        segments = segment_returns(pos, ret, np.zeros(pos.shape[1]), self.initial_cash, self.exe_cost if np.isscalar(self.exe_cost) else 0.0)
+
+        # ロング・ショートそれぞれ等金額のウェイト
+        weights = positions_to_weights(pos)
+
+        cash, cost, turnover = holdings_path(weights, np.expm1(np.nan_to_num(ret, nan=0.0)), self._cost_rates(positions_df.columns), self.initial_cash)
+
+        self.trade_log = pd.DataFrame({
+            "date": dates,
+            "cash": cash,
+            "buy_ret": segments["buy_ret"],
+            "sell_ret": segments["sell_ret"],
+            "neutral_ret": segments["neutral_ret"],
+            "long_short_ret": segments["long_short_ret"],
+            "cost": cost,
+            "turnover": turnover
+        })
+        self.equity_curve = pd.Series(cash, index=dates, dtype=float)
+
+    def _run_weights(self, positions_df: pd.DataFrame, returns_df: pd.DataFrame):
+        """
+        generate_positions が返す連続値のウェイト（資産に対する保有額の比率）で全期間一括計算する。
+        ポートフォリオのリターンを long_short_ret、売買回転率を turnover 列として trade_log に記録する。
+        """
+        positions_df = positions_df[positions_df.index.isin(returns_df.index)]
+        dates = positions_df.index
+
+        weights = np.nan_to_num(positions_df.to_numpy(dtype=self.dtype, na_value=np.nan), nan=0.0)
+        ret = returns_df.reindex(dates).to_numpy(dtype=self.dtype)
+        rates = self.exe_cost if np.isscalar(self.exe_cost) else self._cost_rates(positions_df.columns)
+
+        result = weight_returns(weights, ret, np.zeros(weights.shape[1]), self.initial_cash, rates, dtype=self.dtype)
+
+        self.trade_log = pd.DataFrame({"date": dates, **result})
+        self.equity_curve = pd.Series(result["cash"], index=dates, dtype=float)
+
+    def _cost_rates(self, columns: pd.Index) -> np.ndarray:
+        """
+        銘柄ごとの売買コスト率の配列を返す。
+        """
+        if isinstance(self.exe_cost, pd.Series):
+            missing = columns.difference(self.exe_cost.index)
+            if not missing.empty:
+                raise KeyError(f"コスト率が指定されていない銘柄があります: {list(missing[:5])}")
+            return self.exe_cost.reindex(columns).to_numpy(dtype=float)
+        return np.full(len(columns), float(self.exe_cost))
 
     def get_equity_curve(self):
         return self.equity_curve
 
+    def get_positions(self):
+        return self.positions_df
+
     def get_trade_log(self):
         return pd.DataFrame(self.trade_log)
 
@@ -0,0 +1,125 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .backtester import segment_returns
+from ..evaluator.evaluator import OnlineEvaluator
+
+
+class IncrementalBacktester:
+    """
+    日次の追加データだけを処理する状態付きバックテスト。
+    直前のポジション・資産・価格と OnlineEvaluator の状態を保持し、update のたびに前回より後の日付だけを進める。
+    全期間を Backtester で再実行した場合と同じ trade_log を返す。
+    状態には再開に必要な値と評価指標の累積値だけを持ち、trade_log は保持しない
+    （全期間の trade_log が必要な場合は、update が返す行を呼び出し側で保存する）。
+
+    戦略のポジションは、新しい日付に直近 lookback 日分のデータを加えた区間で generate_positions を呼んで求める。
+    各日付のポジションがその日のデータだけで決まる戦略（分位戦略など）は lookback=0 でよい。
+    """
+    def __init__(self, exe_cost=0.001, initial_cash=1_000_000, lookback: int = 0, strategy_name: str = "UnnamedStrategy"):
+        self.exe_cost = exe_cost
+        self.initial_cash = initial_cash
+        self.lookback = lookback
+
+        self.last_date = None
+        self.columns = None       # 価格とファクターに共通する銘柄（初回に確定）
+        self.universe = None      # 上記のうちポジションが出力される銘柄（初回に確定）
+        self.prev_pos = None
+        self.cash = initial_cash
+        self.last_prices = None   # 直近の価格1行（次のリターン計算用）
+        self.price_buffer = None  # 直近 lookback 日分の価格
+        self.factor_buffer = None # 直近 lookback 日分のファクター
+        self.evaluator = OnlineEvaluator(strategy_name=strategy_name)
+
+    def _new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.last_date is None:
+            return df
+        return df.iloc[df.index.searchsorted(self.last_date, side="right"):]
+
+    def update(self, strategy, price_df: pd.DataFrame, factor_df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        前回の update より後の日付だけバックテストを進める。
+
+        Parameters:
+            strategy: 戦略インスタンス
+            price_df (pd.DataFrame): 価格データ（昇順のDatetimeIndex。過去分を含んでいてよい）
+            factor_df (pd.DataFrame, optional): ファクターデータ（同上）
+
+        Returns:
+            pd.DataFrame: 今回追加された trade_log の行
+        """
+        price_new = self._new_rows(price_df)
+        factor_new = self._new_rows(factor_df) if factor_df is not None else None
+
+        # 日付・銘柄をそろえる
+        if factor_new is not None:
+            common_dates = price_new.index.intersection(factor_new.index)
+            price_new = price_new.loc[common_dates]
+            factor_new = factor_new.loc[common_dates]
+        if self.columns is None:
+            self.columns = price_df.columns if factor_df is None else price_df.columns.intersection(factor_df.columns)
+            if self.columns.empty:
+                raise ValueError("price_dfとfactor_dfに共通する銘柄が存在しません。")
+        price_new = price_new[self.columns]
+        if factor_new is not None:
+            factor_new = factor_new[self.columns]
+        if price_new.empty:
+            return pd.DataFrame()
+
+        # 対数リターン（前回の最終価格から続けて計算する）
+        prices_ext = price_new if self.last_prices is None else pd.concat([self.last_prices, price_new])
+        returns_df = np.log(prices_ext / prices_ext.shift(1)).iloc[0 if self.last_prices is None else 1:].dropna()
+
+        # 直近 lookback 日分を加えてポジションを生成し、新しい日付の分だけ使う
+        price_window = price_new if self.price_buffer is None else pd.concat([self.price_buffer, price_new])
+        factor_window = None
+        if factor_new is not None:
+            factor_new_aligned = factor_new.loc[returns_df.index]
+            factor_window = factor_new_aligned if self.factor_buffer is None else pd.concat([self.factor_buffer, factor_new_aligned])
+        positions_df = strategy.generate_positions(price_window, factor_window)
+
+        if self.universe is None:
+            self.universe = returns_df.columns.intersection(positions_df.columns)
+            self.prev_pos = np.zeros(len(self.universe))
+        positions_df = positions_df[self.universe]
+        positions_df = positions_df[positions_df.index.isin(returns_df.index)]
+        dates = positions_df.index
+
+        pos = np.nan_to_num(positions_df.to_numpy(dtype=float, na_value=np.nan), nan=0.0)
+        ret = returns_df[self.universe].reindex(dates).to_numpy(dtype=float)
+        result = segment_returns(pos, ret, self.prev_pos, self.cash, self.exe_cost)
+        trade_log = pd.DataFrame({"date": dates, **result})
+
+        # 状態を更新
+        if len(dates) > 0:
+            self.prev_pos = pos[-1]
+            self.cash = result["cash"][-1]
+        self.last_date = price_new.index[-1]
+        self.last_prices = price_new.iloc[[-1]]
+        if self.lookback > 0:
+            self.price_buffer = price_window.iloc[-self.lookback:]
+            if factor_window is not None:
+                self.factor_buffer = factor_window.iloc[-self.lookback:]
+        self.evaluator.update(trade_log)
+
+        return trade_log
+
+    def evaluate(self) -> pd.DataFrame:
+        """
+        これまでの全期間の評価指標（Evaluator.evaluate と同じ形式）を返す。
+        """
+        return self.evaluator.evaluate()
+
+    def save(self, path: str):
+        """
+        状態をファイルに保存する（戦略インスタンスは含まない）。
+        """
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalBacktester":
+        with open(path, "rb") as f:
+            return pickle.load(f)
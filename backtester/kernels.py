@@ -0,0 +1,80 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _holdings_loop_numpy(weights: np.ndarray, simple_ret: np.ndarray, rates: np.ndarray, cash: float):
+    T, N = weights.shape
+    cash_path = np.empty(T)
+    cost = np.empty(T)
+    turnover = np.empty(T)
+
+    held = np.zeros(N)  # 直前の日付から値動きした後の銘柄ごとの保有額
+    value = cash
+    for t in range(T):
+        target = value * weights[t]
+        trade = np.abs(target - held)
+        cost[t] = rates @ trade
+        turnover[t] = trade.sum()
+        value = value + target @ simple_ret[t] - cost[t]
+        held = target * (1 + simple_ret[t])
+        cash_path[t] = value
+    return cash_path, cost, turnover
+
+
+def _holdings_loop_scalar(weights, simple_ret, rates, cash):
+    T, N = weights.shape
+    cash_path = np.empty(T)
+    cost = np.empty(T)
+    turnover = np.empty(T)
+
+    held = np.zeros(N)
+    value = cash
+    for t in range(T):
+        c = 0.0
+        traded = 0.0
+        pnl = 0.0
+        for i in range(N):
+            target = value * weights[t, i]
+            trade = abs(target - held[i])
+            c += rates[i] * trade
+            traded += trade
+            pnl += target * simple_ret[t, i]
+            held[i] = target * (1 + simple_ret[t, i])
+        value = value + pnl - c
+        cost[t] = c
+        turnover[t] = traded
+        cash_path[t] = value
+    return cash_path, cost, turnover
+
+
+# Numba があれば銘柄ごとのループをJITコンパイルし、なければ日付ループ + 行単位のNumPy演算で計算する
+if numba is not None:
+    HOLDINGS_BACKEND = "numba"
+    _holdings_loop = numba.njit(cache=True, nogil=True)(_holdings_loop_scalar)
+else:
+    HOLDINGS_BACKEND = "numpy"
+    _holdings_loop = _holdings_loop_numpy
+
+
+def holdings_path(weights: np.ndarray, simple_ret: np.ndarray, rates: np.ndarray, cash: float):
+    """
+    銘柄ごとの保有額を日付順に追跡し、実際の売買額に基づくコストと資産推移を計算する。
+    各日付で直前の資産 × weights を目標保有額とし、値動き後の保有額との差額を売買する。
+
+    Parameters:
+        weights (np.ndarray): 日付 × 銘柄 の目標ウェイト（資産に対する保有額の比率）
+        simple_ret (np.ndarray): 日付 × 銘柄 の単純リターン（NaNなし）
+        rates (np.ndarray): 銘柄ごとの売買コスト率
+        cash (float): 初期資産
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): 日付ごとの資産・コスト・売買額
+    """
+    weights = np.ascontiguousarray(weights, dtype=np.float64)
+    simple_ret = np.ascontiguousarray(simple_ret, dtype=np.float64)
+    rates = np.ascontiguousarray(rates, dtype=np.float64)
+    return _holdings_loop(weights, simple_ret, rates, float(cash))
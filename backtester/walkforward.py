@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from .backtester import Backtester
+
+
+def rolling_windows(dates: pd.Index, length: int, step: int = None, expanding: bool = False) -> list:
+    """
+    日付インデックスから (開始日, 終了日) のウォークフォワード期間を作成する。
+
+    Parameters:
+        dates (pd.Index): 昇順の日付
+        length (int): 1期間の日数（expanding=True の場合は最初の期間の日数）
+        step (int, optional): 期間をずらす日数（未指定なら length）
+        expanding (bool): Trueなら開始日を固定して終了日だけをずらす
+
+    Returns:
+        list: (start_date, end_date) のリスト（両端を含む）
+    """
+    step = step or length
+    windows = []
+    for stop in range(length, len(dates) + 1, step):
+        start = 0 if expanding else stop - length
+        windows.append((dates[start], dates[stop - 1]))
+    return windows
+
+
+def walk_forward_metrics(backtester: Backtester, windows: list, segment: str = "long_short_ret") -> pd.DataFrame:
+    """
+    全期間で実行済みの Backtester の結果から、各期間を個別にバックテストした場合の評価指標を計算する。
+    期間ごとに再実行はせず、リターンの累積和・累積積の差分から指標を求める。
+    各日付のポジションがその日のデータだけで決まる戦略（戦略の再学習なし）を前提とする。
+    期間ごとの資産は "vectorized" / "loop" エンジンのコスト計算で求めるため、他のエンジンでは ValueError とする。
+
+    Parameters:
+        backtester (Backtester): 全期間で run() 済みの Backtester
+        windows (list): (start_date, end_date) のリスト
+        segment (str): 評価するセグメント（buy_ret, sell_ret, neutral_ret, long_short_ret）
+
+    Returns:
+        pd.DataFrame: 1期間1行（window_start, window_end, periods, Evaluatorと同じ指標, final_cash）
+    """
+    if backtester.engine not in ("vectorized", "loop"):
+        raise ValueError(f"累積和からの期間指標は engine='vectorized' / 'loop' でのみ計算できます（期間ごとに実行する場合は refit=True）: {backtester.engine}")
+
+    trade_log = backtester.get_trade_log()
+    price_dates = backtester.prices.index
+    trade_dates = pd.DatetimeIndex(trade_log["date"]) if len(trade_log) else pd.DatetimeIndex([])
+
+    r = trade_log[segment].to_numpy(dtype=float) if len(trade_log) else np.zeros(0)
+    valid = ~np.isnan(r)
+    r0 = np.where(valid, r, 0.0)
+
+    # 累積積（資産）、中心化したリターンの累積和（標準偏差用）、勝ち数・有効数の累積和
+    equity = np.concatenate([[1.0], np.cumprod(1 + r0)])
+    center = r0[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, r - center, 0.0)
+    s1 = np.concatenate([[0.0], np.cumsum(centered)])
+    s2 = np.concatenate([[0.0], np.cumsum(centered ** 2)])
+    n_valid = np.concatenate([[0], np.cumsum(valid)])
+    wins = np.concatenate([[0], np.cumsum(r > 0)])
+
+    # 期間の資産：先頭日だけは直前ポジションが0（全銘柄が新規売買）としてコストを計算し直す
+    pos = np.nan_to_num(backtester.get_positions().to_numpy(dtype=float, na_value=np.nan), nan=0.0)
+    n_cols = pos.shape[1]
+    ls_ret = trade_log["long_short_ret"].to_numpy(dtype=float) if len(trade_log) else np.zeros(0)
+    prev = np.vstack([np.zeros((1, n_cols)), pos[:-1]])
+    rate = backtester.exe_cost / n_cols if n_cols > 0 else 0.0
+    growth = 1 + ls_ret - rate * (pos != prev).sum(axis=1)
+    first_growth = 1 + ls_ret - rate * (pos != 0).sum(axis=1)
+    growth_cum = np.concatenate([[1.0], np.cumprod(growth)])
+
+    rows = []
+    for start_date, end_date in windows:
+        # 期間内の価格の先頭日はリターンが計算されないため、その翌日以降の取引日が対象
+        lo = price_dates.searchsorted(pd.Timestamp(start_date), side="left")
+        hi = price_dates.searchsorted(pd.Timestamp(end_date), side="right")
+        row = {"window_start": pd.Timestamp(start_date), "window_end": pd.Timestamp(end_date)}
+        if hi - lo < 2:
+            a = b = 0
+        else:
+            a = trade_dates.searchsorted(price_dates[lo], side="right")
+            b = trade_dates.searchsorted(price_dates[hi - 1], side="right")
+        n = b - a
+        row["periods"] = n
+
+        if n == 0:
+            row.update({k: np.nan for k in ["cum.Ret", "ann.Ret", "ann.Std", "R/R", "Win_R", "Max_DD", "Calmar Ratio", "final_cash"]})
+            rows.append(row)
+            continue
+
+        window_equity = equity[a + 1:b + 1] / equity[a]
+        total_ret = window_equity[-1] - 1
+        ann_ret = (1 + total_ret) ** (52 / n) - 1
+        count = n_valid[b] - n_valid[a]
+        sum1 = s1[b] - s1[a]
+        var = (s2[b] - s2[a] - sum1 ** 2 / count) / (count - 1) if count > 1 else np.nan
+        ann_std = np.sqrt(max(var, 0.0)) * np.sqrt(52) if count > 1 else np.nan
+        max_dd = ((window_equity / np.maximum.accumulate(window_equity)) - 1).min()
+
+        row.update({
+            "cum.Ret": total_ret,
+            "ann.Ret": ann_ret,
+            "ann.Std": ann_std,
+            "R/R": ann_ret / ann_std if ann_std != 0 else np.nan,
+            "Win_R": (wins[b] - wins[a]) / n,
+            "Max_DD": max_dd,
+            "Calmar Ratio": ann_ret / abs(max_dd) if max_dd < 0 else np.nan,
+            "final_cash": backtester.initial_cash * first_growth[a] * growth_cum[b] / growth_cum[a + 1],
+        })
+        rows.append(row)
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+def positions_to_weights(pos: np.ndarray) -> np.ndarray:
+    """
+    -1/0/1 のポジションを、ロング・ショートそれぞれ合計1の等金額ウェイトに変換する。
+
+    Parameters:
+        pos (np.ndarray): 日付 × 銘柄 のポジション（NaNは0に補完済み）
+
+    Returns:
+        np.ndarray: 日付 × 銘柄 のウェイト（ロングは正、ショートは負）
+    """
+    long, short = pos == 1, pos == -1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights = long / long.sum(axis=1, keepdims=True) - short / short.sum(axis=1, keepdims=True)
+    return np.nan_to_num(weights, nan=0.0)
+
+
+def weight_returns(weights: np.ndarray, ret: np.ndarray, prev_weights: np.ndarray, cash: float, rates, dtype=np.float64) -> dict:
+    """
+    ウェイト行列とリターン行列（日付 × 銘柄）から、ポートフォリオのリターン・売買回転率・コスト・資産を一括で計算する。
+    ポートフォリオのリターンは行ごとの内積、売買回転率は前日からのウェイト変化の絶対値の合計。
+    セグメント別のリターンも同時に求める（buy_ret / sell_ret は正/負ウェイトで加重した平均、neutral_ret はウェイト0の単純平均）。
+    -1/0/1 のポジションを positions_to_weights で変換したウェイトなら、ロング・ショートの両方がある日付の
+    各セグメントのリターンは segment_returns と一致する。
+
+    Parameters:
+        weights (np.ndarray): ウェイト（NaNは0に補完済み）
+        ret (np.ndarray): リターン
+        prev_weights (np.ndarray): 先頭日付の直前のウェイト（銘柄数の1次元配列）
+        cash (float): 先頭日付の直前の資産
+        rates (float or np.ndarray): 売買コスト率（銘柄ごとに指定する場合は銘柄数の1次元配列）
+        dtype: 計算に使う浮動小数点型（np.float32 / np.float64）。資産の累積積は float64 で計算する
+
+    Returns:
+        dict: cash, buy_ret, sell_ret, neutral_ret, long_short_ret, cost, turnover の各配列
+    """
+    w = np.asarray(weights, dtype=dtype)
+    valid = ~np.isnan(ret)
+    r = np.where(valid, ret, 0).astype(dtype, copy=False)
+
+    # ポートフォリオのリターン（行ごとの内積）
+    portfolio_ret = np.einsum("ij,ij->i", w, r)
+
+    # セグメント別（正/負ウェイトで加重した平均、ウェイト0は単純平均）
+    w_long = np.maximum(w, 0)
+    w_short = np.maximum(-w, 0)
+    neutral = (w == 0) & valid
+    with np.errstate(invalid="ignore", divide="ignore"):
+        buy_ret = np.einsum("ij,ij->i", w_long, r) / w_long.sum(axis=1)
+        sell_ret = np.einsum("ij,ij->i", w_short, r) / w_short.sum(axis=1)
+        neutral_ret = np.where(neutral, r, 0).sum(axis=1) / neutral.sum(axis=1)
+
+    # 売買回転率（ウェイト変化の絶対値の合計）とコスト
+    prev = np.vstack([np.asarray(prev_weights, dtype=dtype).reshape(1, -1), w[:-1]])
+    delta = np.abs(w - prev)
+    turnover = delta.sum(axis=1)
+    cost_rate = delta @ np.asarray(rates, dtype=dtype) if np.ndim(rates) else turnover * rates
+
+    growth = 1 + portfolio_ret.astype(np.float64) - cost_rate.astype(np.float64)
+    cash_path = np.cumprod(np.concatenate([[cash], growth]))
+
+    return {
+        "cash": cash_path[1:],
+        "buy_ret": buy_ret,
+        "sell_ret": sell_ret,
+        "neutral_ret": neutral_ret,
+        "long_short_ret": portfolio_ret,
+        "cost": cash_path[:-1] * cost_rate,
+        "turnover": turnover
+    }
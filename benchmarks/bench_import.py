@@ -0,0 +1,84 @@
+"""
+ebuiss のインポート時間と、読み込まれる重い依存ライブラリを計測するベンチマーク。
+
+各インポート文を新しいPythonプロセスで実行し（-X importtime）、合計時間と
+読み込まれてはいけないモジュール（plotly, IPython）が含まれていないかを確認する。
+違反があれば終了コード1を返すため、CIや変更前後の比較でそのまま使える。
+
+使い方:
+    python benchmarks/bench_import.py [--repeat 5] [--max-seconds 2.0] [--output result.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(REPO_ROOT)
+
+# (計測名, インポート文, 読み込まれてはいけないモジュール)
+CASES = [
+    ("package", f"import {PACKAGE}", ["plotly", "IPython"]),
+    ("backtester", f"from {PACKAGE}.backtester.backtester import Backtester", ["plotly", "IPython"]),
+    ("evaluator", f"from {PACKAGE}.evaluator.evaluator import Evaluator", ["plotly", "IPython"]),
+    ("admin", f"from {PACKAGE} import Ebuiss", ["plotly", "IPython"]),
+    ("visualizer", f"from {PACKAGE} import Visualizer", []),
+]
+
+
+def measure(statement: str) -> dict:
+    """
+    新しいプロセスで statement を実行し、インポート時間（秒）と読み込まれたトップレベルモジュールを返す。
+    """
+    code = f"{statement}\nimport sys\nprint('\\n'.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"インポートに失敗しました: {statement}\n{proc.stderr}")
+
+    # importtime の出力は「import time: self [us] | cumulative | package」。トップレベルの累積時間を合計する
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith(" ") or name[1] != " ":
+            total_us += int(cumulative)
+    return {"seconds": total_us / 1e6, "modules": proc.stdout.split()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（中央値を採用）")
+    parser.add_argument("--max-seconds", type=float, default=None, help="コア（package/backtester/evaluator）のインポート時間の上限")
+    parser.add_argument("--output", default=None, help="結果を書き出すJSONファイル")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for name, statement, forbidden in CASES:
+        runs = [measure(statement) for _ in range(args.repeat)]
+        seconds = statistics.median(run["seconds"] for run in runs)
+        loaded = sorted(set(forbidden) & set(runs[0]["modules"]))
+
+        errors = [f"{m} が読み込まれています" for m in loaded]
+        if args.max_seconds is not None and name in ("package", "backtester", "evaluator") and seconds > args.max_seconds:
+            errors.append(f"インポート時間が上限を超えています: {seconds:.3f}s > {args.max_seconds:.3f}s")
+        failed = failed or bool(errors)
+
+        results.append({"case": name, "statement": statement, "seconds": seconds, "forbidden_loaded": loaded, "errors": errors})
+        status = "NG" if errors else "OK"
+        print(f"{status} {name:<12} {seconds * 1000:8.1f} ms  {'; '.join(errors)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+合成データでバックテストの各工程の実行時間とピークメモリを計測するベンチマーク。
+
+銘柄数 × 年数 × ファクター数の全組み合わせについて、次の工程を計測する。
+    register_factors, shift_factors, get_factor, get_factor_shifted,
+    generate_positions, backtest, evaluate
+結果はJSONで書き出せる。--compare で以前の結果と比較できる。ネットワークは使わない。
+
+使い方:
+    python benchmarks/bench_pipeline.py --preset quick --output result.json
+    python benchmarks/bench_pipeline.py --tickers 100,1000 --years 1,10 --factors 1 --compare result.json
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_dates, make_factors, make_prices, make_tickers
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(REPO_ROOT)
+
+PRESETS = {
+    "quick": {"tickers": [100, 500], "years": [1, 5], "factors": [1]},
+    "default": {"tickers": [100, 1000], "years": [1, 10], "factors": [1, 5]},
+    "full": {"tickers": [100, 1000, 5000], "years": [1, 10, 30], "factors": [1, 10]},
+}
+
+
+def import_package():
+    """
+    リポジトリを ebuiss パッケージとしてインポートする（戦略ファイルは ebuiss.strategy をインポートするため）。
+    """
+    sys.path.insert(0, os.path.dirname(REPO_ROOT))
+    package = importlib.import_module(PACKAGE)
+    sys.modules.setdefault("ebuiss", package)
+    return package
+
+
+def build_stages(args):
+    """
+    (工程名, 準備関数, 計測する関数) のリストを返す。準備関数の時間は計測に含めない。
+    各関数は工程間で共有する辞書 ctx を受け取る。
+    """
+    from ebuiss.backtester.backtester import Backtester
+    from ebuiss.ebuissdb.ebuissdb import EbuissDB
+    from ebuiss.evaluator.evaluator import Evaluator
+    from ebuiss.strategy_driver.strategy_driver import StrategyDriver
+
+    driver = StrategyDriver()
+
+    def register_factors(ctx):
+        ctx["db"] = EbuissDB()
+        ctx["db"].register(name="prices", df=ctx["prices"])
+        ctx["db"].register_factors(ctx["factors"], "syn")
+
+    def shift_factors(ctx):
+        ctx["db"].shift_factors([1])
+
+    def clear_cache(ctx):
+        ctx["db"].clear_factor_cache()
+
+    def get_factor(ctx):
+        ctx["factor_df"] = ctx["db"].get_factor("syn_f0")
+
+    def get_factor_shifted(ctx):
+        ctx["db"].get_factor("syn_f0_shifted1")
+
+    def generate_positions(ctx):
+        strategy = driver.load_strategy(args.strategy)
+        ctx["positions"] = strategy.generate_positions(ctx["prices"], ctx["factor_df"])
+
+    def backtest(ctx):
+        strategy = driver.load_strategy(args.strategy)
+        backtester = Backtester(strategy, ctx["prices"], ctx["factor_df"], exe_cost=0.001, engine=args.engine)
+        backtester.run()
+        ctx["trade_log"] = backtester.get_trade_log()
+
+    def evaluate(ctx):
+        Evaluator(ctx["trade_log"]).evaluate()
+
+    noop = lambda ctx: None
+    return [
+        ("register_factors", noop, register_factors),
+        ("shift_factors", noop, shift_factors),
+        ("get_factor", clear_cache, get_factor),
+        ("get_factor_shifted", noop, get_factor_shifted),
+        ("generate_positions", noop, generate_positions),
+        ("backtest", noop, backtest),
+        ("evaluate", noop, evaluate),
+    ]
+
+
+def measure(prepare, func, ctx: dict, repeat: int) -> dict:
+    """
+    func を repeat 回実行した時間と、tracemalloc で計測したピークメモリ（func 開始時からの増分）を返す。
+    """
+    seconds = []
+    for _ in range(repeat):
+        prepare(ctx)
+        start = time.perf_counter()
+        func(ctx)
+        seconds.append(time.perf_counter() - start)
+
+    # 時間の計測に影響しないよう、ピークメモリは別の1回で計測する
+    prepare(ctx)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(seconds),
+        "seconds_min": min(seconds),
+        "repeat": repeat,
+        "peak_bytes": peak - base,
+    }
+
+
+def run(args) -> list:
+    stages = build_stages(args)
+    results = []
+    for n_tickers, years, n_factors in itertools.product(args.tickers, args.years, args.factors):
+        dates = make_dates(years, freq=args.freq)
+        tickers = make_tickers(n_tickers)
+        ctx = {
+            "prices": make_prices(dates, tickers, seed=args.seed),
+            "factors": make_factors(dates, tickers, n_factors, seed=args.seed + 1),
+        }
+        size = {"tickers": n_tickers, "years": years, "factors": n_factors, "dates": len(dates)}
+
+        for stage, prepare, func in stages:
+            record = {**size, "stage": stage, **measure(prepare, func, ctx, args.repeat)}
+            results.append(record)
+            print(f"{n_tickers:>6} tickers {years:>3} y {n_factors:>3} f  {stage:<20} "
+                  f"{record['seconds'] * 1000:10.1f} ms  {record['peak_bytes'] / 1024 ** 2:10.1f} MiB", flush=True)
+    return results
+
+
+def compare(results: list, baseline_path: str):
+    """
+    以前の結果ファイルと、同じサイズ・工程の実行時間とピークメモリの比（今回 / 以前）を表示する。
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    keys = ["tickers", "years", "factors", "stage"]
+    old = pd.DataFrame(baseline).set_index(keys)
+    new = pd.DataFrame(results).set_index(keys)
+    joined = new.join(old, how="inner", rsuffix="_base")
+    table = pd.DataFrame({
+        "seconds": joined["seconds"],
+        "seconds_base": joined["seconds_base"],
+        "time_ratio": joined["seconds"] / joined["seconds_base"],
+        "memory_ratio": joined["peak_bytes"] / joined["peak_bytes_base"].replace(0, np.nan),
+    })
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+def parse_sizes(text: str) -> list:
+    return [float(v) if "." in v else int(v) for v in text.split(",")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default", help="サイズの組み合わせ")
+    parser.add_argument("--tickers", type=parse_sizes, default=None, help="銘柄数（カンマ区切り）")
+    parser.add_argument("--years", type=parse_sizes, default=None, help="年数（カンマ区切り）")
+    parser.add_argument("--factors", type=parse_sizes, default=None, help="ファクター数（カンマ区切り）")
+    parser.add_argument("--freq", default="W-FRI", help="日付の頻度（pandasの頻度文字列）")
+    parser.add_argument("--repeat", type=int, default=3, help="各工程の計測回数（中央値を採用）")
+    parser.add_argument("--seed", type=int, default=0, help="合成データのseed")
+    parser.add_argument("--strategy", default="test_strategy_5q", help="使用する戦略名")
+    parser.add_argument("--engine", default="vectorized", help="Backtesterのエンジン")
+    parser.add_argument("--output", default=None, help="結果を書き出すJSONファイル")
+    parser.add_argument("--compare", default=None, help="比較する以前の結果JSONファイル")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    args.tickers = args.tickers or preset["tickers"]
+    args.years = args.years or preset["years"]
+    args.factors = args.factors or preset["factors"]
+
+    import_package()
+    results = run(args)
+
+    if args.output:
+        meta = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "freq": args.freq,
+            "seed": args.seed,
+            "strategy": args.strategy,
+            "engine": args.engine,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+ベンチマーク用の決定的な合成データ（価格パネル・MultiIndexファクター）を作成する。
+同じ引数・seed からは常に同じデータが作られる。
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def make_dates(years: float, freq: str = "W-FRI", start: str = "1995-01-06") -> pd.DatetimeIndex:
+    """
+    years 年分の日付を作成する（freq は pandas の頻度文字列。既定は週次）。
+    """
+    end = pd.Timestamp(start) + pd.DateOffset(days=int(round(years * 365.25)) - 1)
+    return pd.date_range(start, end, freq=freq)
+
+
+def make_tickers(n_tickers: int) -> pd.Index:
+    return pd.Index([f"T{i:05d}" for i in range(n_tickers)])
+
+
+def make_prices(dates: pd.DatetimeIndex, tickers: pd.Index, seed: int = 0, nan_frac: float = 0.0) -> pd.DataFrame:
+    """
+    幾何ブラウン運動の価格パネル（index=日付, columns=銘柄）を作成する。
+    nan_frac の割合で欠損を入れる（Backtester はリターンに欠損がある日付を落とすため、既定は欠損なし）。
+    """
+    rng = np.random.default_rng(seed)
+    shape = (len(dates), len(tickers))
+    log_ret = rng.normal(0.0005, 0.02, shape)
+    prices = 100 * np.exp(np.cumsum(log_ret, axis=0))
+    if nan_frac > 0:
+        prices[rng.random(shape) < nan_frac] = np.nan
+    return pd.DataFrame(prices, index=dates, columns=tickers)
+
+
+def make_factors(dates: pd.DatetimeIndex, tickers: pd.Index, n_factors: int, seed: int = 1, nan_frac: float = 0.05) -> pd.DataFrame:
+    """
+    EbuissDB.register_factors に渡す形式のファクター（MultiIndex [ticker, date], columns=f0, f1, ...）を作成する。
+    """
+    rng = np.random.default_rng(seed)
+    n = len(dates) * len(tickers)
+    values = rng.normal(size=(n, n_factors))
+    if nan_frac > 0:
+        values[rng.random((n, n_factors)) < nan_frac] = np.nan
+
+    index = pd.MultiIndex.from_product([tickers, dates], names=["ticker", "date"])
+    return pd.DataFrame(values, index=index, columns=[f"f{i}" for i in range(n_factors)])
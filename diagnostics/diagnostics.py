@@ -0,0 +1,190 @@
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ..strategy.ranking import buckets_from_ranks, cross_sectional_rank
+
+# 1行（ファクター1つ・1日付）の計算に使う作業配列の数（メモリ見積もり用）
+_WORK_ARRAYS = 12
+
+
+@dataclass
+class FactorDiagnostics:
+    """
+    factor_diagnostics の結果。
+
+    Attributes:
+        ic (pd.DataFrame): index=日付, columns=ファクター の横断面スピアマンIC
+        quantile_returns (pd.DataFrame): index=日付, columns=(ファクター, 分位) の分位ごとの平均フォワードリターン
+        summary (pd.DataFrame): index=ファクター の集計（IC平均・標準偏差・ICIR・t値・勝率・分位平均リターン・スプレッド）
+    """
+    ic: pd.DataFrame
+    quantile_returns: pd.DataFrame
+    summary: pd.DataFrame
+
+
+def forward_returns(prices: pd.DataFrame, horizon: int = 1) -> pd.DataFrame:
+    """
+    各日付から horizon 期先までの対数リターン log(p[t+horizon] / p[t]) を返す（末尾 horizon 行はNaN）。
+    """
+    return np.log(prices.shift(-horizon) / prices)
+
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    2次元配列を行ごとに順位付けする（同値は平均順位、1始まり、NaNは順位なしでNaN）。
+    row.rank(method="average") と同じ結果を全行一括で求める。
+    """
+    order = np.argsort(values, axis=1, kind="stable")  # NaNは末尾
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    n_cols = values.shape[1]
+    pos = np.broadcast_to(np.arange(n_cols), values.shape)
+
+    # 同値のまとまりの先頭位置と末尾位置から平均順位を求める
+    starts = np.ones(values.shape, dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    ends = np.ones(values.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, pos, n_cols - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def spearman_ic(factor: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """
+    行ごとに、両方が有効な銘柄だけでスピアマンの順位相関を計算する（有効銘柄が3未満の行はNaN）。
+
+    Parameters:
+        factor (np.ndarray): 行 × 銘柄 のファクター値
+        returns (np.ndarray): 行 × 銘柄 のリターン
+
+    Returns:
+        np.ndarray: 行ごとのIC
+    """
+    valid = ~np.isnan(factor) & ~np.isnan(returns)
+    rank_x = average_ranks(np.where(valid, factor, np.nan))
+    rank_y = average_ranks(np.where(valid, returns, np.nan))
+
+    # 同じ銘柄集合の平均順位なので、どちらの平均も (n + 1) / 2
+    n = valid.sum(axis=1)
+    center = ((n + 1) / 2)[:, None]
+    dx = np.where(valid, rank_x - center, 0.0)
+    dy = np.where(valid, rank_y - center, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ic = (dx * dy).sum(axis=1) / np.sqrt((dx ** 2).sum(axis=1) * (dy ** 2).sum(axis=1))
+    return np.where(n >= 3, ic, np.nan)
+
+
+def quantile_mean_returns(factor: np.ndarray, returns: np.ndarray, n_quantiles: int) -> np.ndarray:
+    """
+    行ごとにファクターを分位に分け（quantile_buckets と同じ分類、0が最小）、各分位の平均リターンを求める。
+
+    Returns:
+        np.ndarray: 行 × 分位 の平均リターン（銘柄がない分位はNaN）
+    """
+    ranks, counts = cross_sectional_rank(factor, ascending=True)
+    buckets = buckets_from_ranks(ranks, counts, n_quantiles)
+    valid_ret = ~np.isnan(returns)
+    ret = np.where(valid_ret, returns, 0.0)
+
+    result = np.full((len(factor), n_quantiles), np.nan)
+    for q in range(n_quantiles):
+        mask = (buckets == q) & valid_ret
+        count = mask.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[:, q] = np.where(count > 0, np.where(mask, ret, 0.0).sum(axis=1) / count, np.nan)
+    return result
+
+
+def _factor_groups(n_factors: int, n_dates: int, n_tickers: int, memory_budget: int) -> tuple:
+    """
+    メモリ上限に収まるよう、一度に積み重ねるファクター数と、1ファクター内で一度に計算する日付数を決める。
+    """
+    row_bytes = n_tickers * 8 * _WORK_ARRAYS
+    rows_per_chunk = max(1, memory_budget // max(row_bytes, 1))
+    factors_per_group = max(1, min(n_factors, rows_per_chunk // max(n_dates, 1)))
+    dates_per_chunk = min(n_dates, rows_per_chunk) if factors_per_group == 1 else n_dates
+    return factors_per_group, dates_per_chunk
+
+
+def factor_diagnostics(prices: pd.DataFrame, get_factor, factor_names: list, horizon: int = 1, n_quantiles: int = 5,
+                       memory_budget: int = 512 * 1024 ** 2) -> FactorDiagnostics:
+    """
+    全ファクターについて、横断面スピアマンIC（対フォワード対数リターン）と分位ごとの平均リターンを一括で計算する。
+    ファクターを (ファクター × 日付 × 銘柄) の3次元配列に積み重ね、(ファクター, 日付) の行ごとにまとめて計算する。
+    一度に積み重ねる量は memory_budget に収まるよう分割する。
+
+    Parameters:
+        prices (pd.DataFrame): index=日付（昇順のDatetimeIndex）, columns=銘柄 の価格
+        get_factor (callable): ファクター名 → Wide形式DataFrame（EbuissDB.get_factor など）
+        factor_names (list): 対象のファクター名
+        horizon (int): フォワードリターンの期間
+        n_quantiles (int): 分位数
+        memory_budget (int): 作業用メモリの上限（バイト、目安）
+
+    Returns:
+        FactorDiagnostics: ic, quantile_returns, summary
+    """
+    if not factor_names:
+        raise ValueError("診断するファクターがありません。")
+
+    fwd = forward_returns(prices, horizon).to_numpy(dtype=float)
+    dates, tickers = prices.index, prices.columns
+    n_dates, n_tickers = fwd.shape
+    factors_per_group, dates_per_chunk = _factor_groups(len(factor_names), n_dates, n_tickers, memory_budget)
+
+    ic = np.full((n_dates, len(factor_names)), np.nan)
+    quantiles = np.full((n_dates, len(factor_names), n_quantiles), np.nan)
+
+    for start in range(0, len(factor_names), factors_per_group):
+        names = factor_names[start:start + factors_per_group]
+
+        # 価格と同じ日付・銘柄にそろえて積み重ねる（ファクター × 日付 × 銘柄）
+        stacked = np.stack([
+            get_factor(name).reindex(index=dates, columns=tickers).to_numpy(dtype=float)
+            for name in names
+        ])
+
+        for d0 in range(0, n_dates, dates_per_chunk):
+            d1 = min(d0 + dates_per_chunk, n_dates)
+            block = stacked[:, d0:d1].reshape(-1, n_tickers)
+            returns = np.broadcast_to(fwd[d0:d1], (len(names), d1 - d0, n_tickers)).reshape(-1, n_tickers)
+
+            ic[d0:d1, start:start + len(names)] = spearman_ic(block, returns).reshape(len(names), -1).T
+            q = quantile_mean_returns(block, returns, n_quantiles).reshape(len(names), d1 - d0, n_quantiles)
+            quantiles[d0:d1, start:start + len(names)] = q.transpose(1, 0, 2)
+
+    ic_df = pd.DataFrame(ic, index=dates, columns=pd.Index(factor_names, name="factor"))
+    quantile_df = pd.DataFrame(
+        quantiles.reshape(n_dates, -1), index=dates,
+        columns=pd.MultiIndex.from_product([factor_names, range(n_quantiles)], names=["factor", "quantile"])
+    )
+    return FactorDiagnostics(ic=ic_df, quantile_returns=quantile_df, summary=_summarize(ic_df, quantiles))
+
+
+def _summarize(ic_df: pd.DataFrame, quantiles: np.ndarray) -> pd.DataFrame:
+    n = ic_df.count()
+    mean = ic_df.mean()
+    std = ic_df.std()
+    summary = pd.DataFrame({
+        "n_dates": n,
+        "ic_mean": mean,
+        "ic_std": std,
+        "icir": mean / std,
+        "ic_tstat": mean / std * np.sqrt(n),
+        "ic_hit": (ic_df > 0).sum() / n,
+    })
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全日付NaNの分位
+        q_mean = np.nanmean(quantiles, axis=0)  # ファクター × 分位
+    for q in range(q_mean.shape[1]):
+        summary[f"q{q}_ret"] = q_mean[:, q]
+    summary["spread_ret"] = q_mean[:, -1] - q_mean[:, 0]
+    return summary
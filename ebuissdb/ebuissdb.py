@@ -1,42 +1,271 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 from ..hisui.hisuistore import HisuiDB
+from ..hisui.hisuicompact import CompactPolicy
+from ..hisui.hisuiload import read_files, resolve_paths
+from .expression import evaluate_expression, parse_expression
+
+
+@dataclass(frozen=True)
+class FactorHandle:
+    """
+    登録済みファクターへの軽量な参照。
+    Wide形式のDataFrameは get_factor で初めて要求されたときに作成する。
+
+    Attributes:
+        source (str): 元のLong形式DataFrameの登録名（例: "prefix_factors"）
+        column (str): 元DataFrameの列名
+    """
+    source: str
+    column: str
+
+
+@dataclass(frozen=True)
+class ShiftedFactor:
+    """
+    元ファクターをn期シフトした仮想ファクター。データは持たず、元ファクター名とシフト期数だけを保持する。
+
+    Attributes:
+        base (str): シフト元のファクター名（FactorHandleで登録されたもの）
+        offset (int): シフト期数（df.shift(offset) と同じ向き）
+    """
+    base: str
+    offset: int
+
+
+@dataclass(frozen=True)
+class ExpressionFactor:
+    """
+    ファクター式で定義した仮想ファクター。データは持たず、get_factor で初めて評価する。
+
+    Attributes:
+        expression (str): ファクター式（EbuissDB.factor と同じ書式）
+    """
+    expression: str
+
+
+# 追加行のために確保する予備の行数（本体の行数に対する比率）。作り直しは数回の追加に1回で済む
+_APPEND_HEADROOM = 0.125
+
+
+@dataclass
+class _MaterializedFactor:
+    """
+    Wide形式に変換したファクター。シフト版をビューとして切り出せるよう、
+    上下にNaNの余白行を付けた配列 buffer の中に本体 df を置く。
+    下側の余白の後ろには、append_factors で追加する行のための予備の行（NaN）を置くことがある。
+    padded は buffer 全体を包むDataFrameで、df とシフト版はすべてここから切り出す。
+    pandasのCopy-on-Writeが互いの参照を追跡するため、返したDataFrameに書き込むとその時点でコピーされ、
+    キャッシュや他のビューは変わらない。
+    """
+    df: pd.DataFrame
+    buffer: np.ndarray
+    top: int
+    padded: pd.DataFrame
+
+    @classmethod
+    def wrap(cls, buffer: np.ndarray, top: int, index: pd.Index, columns: pd.Index) -> "_MaterializedFactor":
+        padded = pd.DataFrame(buffer, columns=columns, copy=False)
+        df = padded.iloc[top:top + len(index)].set_axis(index, axis=0)
+        return cls(df=df, buffer=buffer, top=top, padded=padded)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.buffer.nbytes + self.df.index.memory_usage() + self.df.columns.memory_usage())
+
+    def view(self) -> pd.DataFrame:
+        """
+        本体 df をコピーせずに返す。書き込んだ場合はCopy-on-Writeでコピーされ、キャッシュは変わらない。
+        """
+        return self.df.copy(deep=False)
+
+    def shifted(self, offset: int) -> pd.DataFrame:
+        """
+        df.shift(offset) と同じ内容を、buffer のビューとしてコピーせずに返す。
+        """
+        start = self.top - offset
+        return self.padded.iloc[start:start + len(self.df)].set_axis(self.df.index, axis=0)
+
+    def extended(self, rows: pd.DataFrame, bottom: int) -> "_MaterializedFactor":
+        """
+        本体の末尾に rows（本体より後の日付、同じ銘柄列）を追加したものを返す。
+        予備の行が足りていて下側の余白がなければ buffer に書き足すだけで済み、コピーは追加行の分だけになる。
+        それ以外は予備の行を付けて buffer を作り直す。
+        これまでに返した df とシフト版のビューが参照する範囲は書き換えない。
+        """
+        n_rows, n_new = len(self.df), len(rows)
+        values = rows.to_numpy(dtype=self.buffer.dtype)
+        index = self.df.index.append(rows.index)
+        end = self.top + n_rows
+
+        if bottom == 0 and end + n_new <= len(self.buffer):
+            self.buffer[end:end + n_new] = values
+            df = self.padded.iloc[self.top:end + n_new].set_axis(index, axis=0)
+            return _MaterializedFactor(df=df, buffer=self.buffer, top=self.top, padded=self.padded)
+
+        spare = max(n_new, int((n_rows + n_new) * _APPEND_HEADROOM))
+        buffer = np.full((self.top + n_rows + n_new + bottom + spare, self.buffer.shape[1]), np.nan, dtype=self.buffer.dtype)
+        buffer[:end] = self.buffer[:end]
+        buffer[end:end + n_new] = values
+        return _MaterializedFactor.wrap(buffer, self.top, index, self.df.columns)
+
 
 class EbuissDB(HisuiDB):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, factor_cache_bytes: int = 2 * 1024 ** 3, compact_policy: CompactPolicy = None):
+        """
+        Parameters:
+            factor_cache_bytes (int): Wide形式ファクターを保持するキャッシュのメモリ上限（バイト）
+            compact_policy (CompactPolicy, optional): 登録時に適用するdtype圧縮の方針
+        """
+        super().__init__(compact_policy=compact_policy)
         self.factor_dict = {}
+        self.factor_cache_bytes = factor_cache_bytes
+        self._factor_cache: "OrderedDict[str, _MaterializedFactor]" = OrderedDict()
+        self._factor_cache_used = 0
+        self._factor_padding = {}  # 元ファクター名 → (上側の余白行数, 下側の余白行数)
 
     def register_factors(self, df: pd.DataFrame, prefix: str):
         """
-        ファクターDataFrameとprefixを受け取り、各列をWide形式に変換して保存。
+        ファクターDataFrameとprefixを受け取り、各列をファクターとして登録する。
+        この時点ではWide形式への変換は行わず、get_factor で初めて変換する。
         インデックス名は必ず ['date', 'ticker'] に矯正する。
 
         Parameters:
             df (pd.DataFrame): MultiIndex(index=[date, ticker] など), columns=[factor1, factor2,...]
             prefix (str): ファクター名に付ける接頭辞
         """
-        
-        if isinstance(df.index, pd.MultiIndex):
+        self.register_factors_many({prefix: df})
+
+    def register_factors_many(self, frames: dict):
+        """
+        複数のファクターDataFrameを1回でまとめて登録する（register_factors のまとめ版）。
+        形式を先にすべて確認するため、エラー時は1件も登録されない。
+
+        Parameters:
+            frames (dict): prefix → register_factors と同じ形式のMultiIndex DataFrame
+        """
+        for prefix, df in frames.items():
+            if not isinstance(df.index, pd.MultiIndex):
+                raise ValueError(f"登録するファクターはMultiIndex (date, ticker) の形式である必要があります: {prefix}")
+        for df in frames.values():
             df.index.names = ["ticker","date"]
-        else:
-            raise ValueError("登録するファクターはMultiIndex (date, ticker) の形式である必要があります。")
-        
-        self.register(name=prefix+"_factors",df=df,overwrite=True)
 
+        sources = {prefix + "_factors": df for prefix, df in frames.items()}
+        self.register_many(sources, overwrite=True)
+
+        # 同じ登録名で上書きした場合、古いデータから作ったキャッシュを捨て、
+        # 新しいデータにない列のファクター（とそのシフト版）を取り除く
+        new_names = {f"{prefix}_{col}" for prefix, df in frames.items() for col in df.columns}
+        stale = {name for name, handle in self.factor_dict.items() if isinstance(handle, FactorHandle) and handle.source in sources}
+        for factor_name in stale:
+            self._evict_factor(factor_name)
+        self._evict_expressions()
+        removed = stale - new_names
+        for factor_name, handle in list(self.factor_dict.items()):
+            if factor_name in removed or (isinstance(handle, ShiftedFactor) and handle.base in removed):
+                del self.factor_dict[factor_name]
+                self._factor_padding.pop(factor_name, None)
+
+        for prefix, df in frames.items():
+            for col in df.columns:
+                factor_name = f"{prefix}_{col}"
+                self.factor_dict[factor_name] = FactorHandle(source=prefix + "_factors", column=col)
+
+    def append_factors(self, df: pd.DataFrame, prefix: str, overlap: str = "skip"):
+        """
+        register_factors で登録済みのファクターに行（新しい日付）を追加する。
+        キャッシュ済みのWide形式ファクターは、追加した行だけを変換して末尾に書き足す（全期間は作り直さない）。
+        登録済みの最終日付以前の行は既定では追加しないため、同じ日の追加処理を再実行しても重複しない。
+
+        Parameters:
+            df (pd.DataFrame): register_factors と同じ形式のMultiIndex DataFrame
+            prefix (str): 登録時のprefix
+            overlap (str): 登録済みの日付と重なる行の扱い（"skip": 追加しない, "error": ValueError）
+        """
+        if not isinstance(df.index, pd.MultiIndex):
+            raise ValueError("追加するファクターはMultiIndex (date, ticker) の形式である必要があります。")
+        df.index.names = ["ticker","date"]
+
+        source = prefix+"_factors"
+        added = self.append(source, df, overlap=overlap)
+        if added.empty:
+            return
+
+        for factor_name, handle in self.factor_dict.items():
+            if isinstance(handle, FactorHandle) and handle.source == source and factor_name in self._factor_cache:
+                self._extend_factor(factor_name, added[handle.column] if handle.column in added.columns else None)
+        self._evict_expressions()
         for col in df.columns:
-            series = df[col]
-            wide_df = series.unstack().T
-            # display(wide_df)
-            factor_name = f"{prefix}_{col}"
-            self.factor_dict[factor_name] = wide_df
+            self.factor_dict.setdefault(f"{prefix}_{col}", FactorHandle(source=source, column=col))
+
+    def _extend_factor(self, name: str, series):
+        """
+        キャッシュ済みのWide形式ファクターに、追加したLong形式の行を書き足す。
+        新しい銘柄を含む場合など書き足せないときは、キャッシュを捨てて次回の get_factor で作り直す。
+        """
+        cached = self._factor_cache[name]
+        rows = self._to_wide(series) if series is not None else None
+        if rows is None or not rows.columns.isin(cached.df.columns).all() or (len(cached.df) and rows.index[0] <= cached.df.index[-1]):
+            self._evict_factor(name)
+            return
+        rows = rows.reindex(columns=cached.df.columns)
+
+        _, bottom = self._factor_padding.get(name, (0, 0))
+        self._evict_factor(name)
+        self._cache_factor(name, cached.extended(rows, bottom))
+
+    @staticmethod
+    def _to_wide(series: pd.Series) -> pd.DataFrame:
+        wide_df = series.unstack(level="ticker")
+        if wide_df.index.dtype == object or pd.api.types.is_string_dtype(wide_df.index.dtype):
+            wide_df.index = pd.to_datetime(wide_df.index)  # 日付文字列は変換時に一度だけDatetimeIndexにする
+        return wide_df
+
+    def load_factor_files(self, source, max_workers: int = None, **read_kwargs) -> pd.DataFrame:
+        """
+        複数のファクターファイルをスレッドプールで並行に読み込み、
+        ファイル名（拡張子なし）をprefixとしてまとめてファクター登録する。
+
+        Parameters:
+            source (str or list): ディレクトリ、globパターン、またはパスのリスト
+            max_workers (int, optional): 読み込みスレッド数
+            **read_kwargs: load_file と同じ絞り込み条件（columns, start_date, end_date, tickers, date_col, ticker_col など）。
+                           date_col / ticker_col の列を持つLong形式のファイルは (ticker, date) のMultiIndexにして登録する
+
+        Returns:
+            pd.DataFrame: ファイルごとの name, path, rows, cols, seconds, error
+        """
+        frames, report = read_files(resolve_paths(source), max_workers=max_workers, **read_kwargs)
+
+        # 形式の誤ったファイルは登録せずに error 列に記録し、残りを1回でまとめて登録する
+        keys = [read_kwargs.get("ticker_col", "ticker"), read_kwargs.get("date_col", "date")]
+        errors = {}
+        for prefix, df in frames.items():
+            if not isinstance(df.index, pd.MultiIndex):
+                if df.index.name in keys:
+                    df = df.reset_index()  # 1列目をインデックスとして読んだCSVなど
+                if all(key in df.columns for key in keys):
+                    frames[prefix] = df = df.set_index(keys)
+            if not isinstance(df.index, pd.MultiIndex):
+                errors[prefix] = "ValueError: 登録するファクターはMultiIndex (date, ticker) の形式である必要があります。"
+        self.register_factors_many({prefix: df for prefix, df in frames.items() if prefix not in errors})
+
+        failed = report["name"].isin(errors.keys())
+        report.loc[failed, "error"] = report.loc[failed, "name"].map(errors)
+        return report
 
     def get_factor(self, name) -> pd.DataFrame:
         """
         factor_dictからWide形式で取得。
+        初回はLong形式から変換してキャッシュし、以降はキャッシュを返す。
+        シフト版ファクターは元ファクターの配列をずらしたビューとして返す（データはコピーしない）。
+        返すDataFrameはキャッシュと配列を共有するが、書き込んだ場合はpandasのCopy-on-Writeでコピーされるため、
+        その場で変更してもキャッシュや他のファクターには影響しない。
 
         Parameters:
-            prefix (str): ファクター登録時のprefix
-            column (str): 元の列名
+            name (str): ファクター名（"{prefix}_{column}" や "{prefix}_{column}_shifted{n}"）
 
         Returns:
             pd.DataFrame: index=date, columns=tickerのWide形式DataFrame
@@ -45,22 +274,186 @@ class EbuissDB(HisuiDB):
         if factor_name not in self.factor_dict:
             raise ValueError(f"Factor '{factor_name}' not found in factor_dict.")
 
-        df = self.factor_dict[factor_name]
-        return df
+        handle = self.factor_dict[factor_name]
+        if isinstance(handle, ShiftedFactor):
+            return self._get_materialized(handle.base).shifted(handle.offset)
+        if isinstance(handle, ExpressionFactor):
+            return self.factor(handle.expression)
+        return self._get_materialized(factor_name).view()
+
+    def factor(self, expression: str) -> pd.DataFrame:
+        """
+        登録済みファクターを組み合わせたファクター式を評価し、Wide形式で返す。
+        式は部分式ごとの木として評価し、各部分式の結果をファクターキャッシュに保存するため、
+        共通の部分式（例: 多数の式に現れる rank(a_mom)）は1回だけ計算される。
+        関数は日付ごとの横断面（銘柄方向）で計算する: rank, zscore, demean, scale, abs, sign, log, shift(式, 期数)。
+        返すDataFrameはキャッシュと配列を共有するが、書き込んだ場合はCopy-on-Writeでコピーされ、キャッシュは変わらない。
+
+        Parameters:
+            expression (str): ファクター式 例: "rank(a_mom) - 0.5*zscore(b_val_shifted1)"
+                              識別子として書けないファクター名は `名前` のようにバッククォートで囲む
+
+        Returns:
+            pd.DataFrame: index=date, columns=tickerのWide形式DataFrame
+        """
+        node = parse_expression(expression, lambda name: self._expression_leaf(name, ()))
+        result = evaluate_expression(node, self.get_factor, self._get_expression_cache, self._put_expression_cache)
+        if not isinstance(result, pd.DataFrame):
+            raise ValueError(f"ファクター式にファクターが含まれていません: {expression}")
+        return result.copy(deep=False)  # キャッシュしたDataFrameそのものは渡さない
+
+    def register_expression(self, name: str, expression: str):
+        """
+        ファクター式を名前付きのファクターとして登録する。データは作らず、get_factor で評価する。
+        登録したファクターは他のファクター式や run_backtest / run_grid からも通常のファクターと同様に使える。
+
+        登録済みのファクター式は同じ名前で置き換えられるが、データを持つファクターとシフト版は置き換えられない。
+
+        Parameters:
+            name (str): ファクター名
+            expression (str): ファクター式（factor と同じ書式）
+        """
+        previous = self.factor_dict.get(name)
+        if previous is not None and not isinstance(previous, ExpressionFactor):
+            raise ValueError(f"'{name}' は登録済みのファクターのため、ファクター式で置き換えられません。")
+
+        # 新しい定義を入れた状態で式の検証と循環参照の確認を行い、失敗したら元に戻す
+        self.factor_dict[name] = ExpressionFactor(expression=expression)
+        try:
+            self._expression_leaf(name, ())
+        except Exception:
+            if previous is None:
+                del self.factor_dict[name]
+            else:
+                self.factor_dict[name] = previous
+            raise
+        self._evict_factor(name)
+        self._evict_expressions()  # name を参照する式の評価結果も作り直す
+
+    def _expression_leaf(self, name: str, resolving: tuple) -> tuple:
+        # 式で定義したファクターは展開して、他の式と共通部分を共有できるようにする
+        if name not in self.factor_dict:
+            raise ValueError(f"Factor '{name}' not found in factor_dict.")
+        handle = self.factor_dict[name]
+        if not isinstance(handle, ExpressionFactor):
+            return ("factor", name)
+        if name in resolving:
+            raise ValueError(f"ファクター式が循環参照しています: {' -> '.join(resolving + (name,))}")
+        return parse_expression(handle.expression, lambda child: self._expression_leaf(child, resolving + (name,)))
+
+    def _get_expression_cache(self, key: str):
+        factor = self._factor_cache.get("expr:" + key)
+        if factor is None:
+            return None
+        self._factor_cache.move_to_end("expr:" + key)
+        return factor.df
+
+    def _put_expression_cache(self, key: str, df: pd.DataFrame):
+        self._cache_factor("expr:" + key, _MaterializedFactor(df=df, buffer=df.to_numpy(), top=0, padded=df))
+
+    def _evict_expressions(self):
+        # 元データが変わった場合、ファクター式の評価結果はすべて作り直す
+        for name in [name for name in self._factor_cache if name.startswith("expr:")]:
+            self._evict_factor(name)
+
+    def _get_materialized(self, name: str) -> _MaterializedFactor:
+        if name in self._factor_cache:
+            self._factor_cache.move_to_end(name)
+            return self._factor_cache[name]
+
+        factor = self._materialize(name)
+        self._cache_factor(name, factor)
+        return factor
+
+    def _materialize(self, name: str) -> _MaterializedFactor:
+        handle = self.factor_dict[name]
+        wide_df = self._to_wide(self.get(handle.source)[handle.column])
+
+        # 登録済みのシフト版がビューとして切り出せるよう、上下にNaNの余白行を付ける
+        top, bottom = self._factor_padding.get(name, (0, 0))
+        values = wide_df.to_numpy()
+        if values.dtype.kind not in "fcO":
+            values = values.astype(float)
+        buffer = np.full((top + len(wide_df) + bottom, wide_df.shape[1]), np.nan, dtype=values.dtype)
+        buffer[top:top + len(wide_df)] = values
+        return _MaterializedFactor.wrap(buffer, top, wide_df.index, wide_df.columns)
+
+    def _cache_factor(self, name: str, factor: _MaterializedFactor):
+        if factor.nbytes > self.factor_cache_bytes:
+            return  # 上限を超える単体のファクターはキャッシュしない
+
+        self._factor_cache[name] = factor
+        self._factor_cache_used += factor.nbytes
+        self._shrink_factor_cache(self.factor_cache_bytes)
+
+    def _evict_factor(self, name: str):
+        factor = self._factor_cache.pop(name, None)
+        if factor is not None:
+            self._factor_cache_used -= factor.nbytes
+
+    def _shrink_factor_cache(self, max_bytes: int):
+        # 最も長く使われていないものから捨てる
+        while self._factor_cache_used > max_bytes and self._factor_cache:
+            name = next(iter(self._factor_cache))
+            self._evict_factor(name)
+
+    def total_memory_bytes(self) -> int:
+        """
+        登録済みデータとファクターキャッシュのメモリ使用量の合計（バイト）を返す。
+        """
+        return super().total_memory_bytes() + self._factor_cache_used
+
+    def set_factor_cache_limit(self, max_bytes: int):
+        """
+        ファクターキャッシュのメモリ上限（バイト）を変更し、超過分を破棄する。
+        """
+        self.factor_cache_bytes = max_bytes
+        self._shrink_factor_cache(max_bytes)
+
+    def clear_factor_cache(self):
+        """
+        Wide形式ファクターのキャッシュをすべて破棄する。
+        """
+        self._factor_cache.clear()
+        self._factor_cache_used = 0
+
+    def factor_cache_info(self) -> dict:
+        """
+        ファクターキャッシュの状態を返す。
+
+        Returns:
+            dict: cached（キャッシュ中のファクター名、古い順。ファクター式の部分式は "expr:" で始まる）, used_bytes, max_bytes
+        """
+        return {
+            "cached": list(self._factor_cache.keys()),
+            "used_bytes": self._factor_cache_used,
+            "max_bytes": self.factor_cache_bytes,
+        }
 
     def list_factors(self) -> pd.DataFrame:
         """
         現在登録されているファクター名一覧をDataFrameで返す。
+        ファクターのWide形式への変換は行わない。
 
         Returns:
-            pd.DataFrame: factor_name列だけを持つテーブル
+            pd.DataFrame: factor_name, base（シフト元、通常ファクターは自身）, shift, cached, expression（式で定義したファクターの式）列を持つテーブル
         """
-        factors = list(self.factor_dict.keys())
-        return pd.DataFrame({"factor_name": factors})
+        records = []
+        for factor_name, handle in self.factor_dict.items():
+            base = handle.base if isinstance(handle, ShiftedFactor) else factor_name
+            records.append({
+                "factor_name": factor_name,
+                "base": base,
+                "shift": handle.offset if isinstance(handle, ShiftedFactor) else 0,
+                "cached": base in self._factor_cache,
+                "expression": handle.expression if isinstance(handle, ExpressionFactor) else None,
+            })
+        return pd.DataFrame(records, columns=["factor_name", "base", "shift", "cached", "expression"])
 
     def shift_factors(self, shifts: list):
         """
-        現在登録されている各ファクターに対して指定されたn期シフト版を作成して保存。
+        現在登録されている各ファクターに対して指定されたn期シフト版を登録する。
+        シフト版は元ファクター名とシフト期数だけを持つ仮想ファクターで、データの複製は作らない。
 
         Parameters:
             shifts (list): シフトさせる期数のリスト (例: [1, 2, 5])
@@ -68,9 +461,50 @@ class EbuissDB(HisuiDB):
         original_factors = list(self.factor_dict.keys())
 
         for factor_name in original_factors:
-            df = self.factor_dict[factor_name]
+            handle = self.factor_dict[factor_name]
+            if isinstance(handle, ExpressionFactor):
+                # 式で定義したファクターは shift を含む式として登録する
+                for n in shifts:
+                    self.factor_dict[f"{factor_name}_shifted{n}"] = ExpressionFactor(expression=f"shift(`{factor_name}`, {n})")
+                continue
+            if isinstance(handle, ShiftedFactor):
+                base, offset = handle.base, handle.offset
+            else:
+                base, offset = factor_name, 0
 
             for n in shifts:
-                shifted_df = df.shift(n)
                 shifted_name = f"{factor_name}_shifted{n}"
-                self.factor_dict[shifted_name] = shifted_df
+                self.factor_dict[shifted_name] = ShiftedFactor(base=base, offset=offset + n)
+                self._reserve_padding(base, offset + n)
+
+    def _catalog_extra(self) -> dict:
+        factors = []
+        for factor_name, handle in self.factor_dict.items():
+            if isinstance(handle, ShiftedFactor):
+                factors.append({"name": factor_name, "base": handle.base, "offset": handle.offset})
+            elif isinstance(handle, ExpressionFactor):
+                factors.append({"name": factor_name, "expression": handle.expression})
+            else:
+                factors.append({"name": factor_name, "source": handle.source, "column": handle.column})
+        return {"factors": factors}
+
+    def _restore_catalog_extra(self, catalog: dict):
+        for entry in catalog.get("factors", []):
+            if "base" in entry:
+                self.factor_dict[entry["name"]] = ShiftedFactor(base=entry["base"], offset=entry["offset"])
+                self._reserve_padding(entry["base"], entry["offset"])
+            elif "expression" in entry:
+                self.factor_dict[entry["name"]] = ExpressionFactor(expression=entry["expression"])
+            else:
+                self.factor_dict[entry["name"]] = FactorHandle(source=entry["source"], column=entry["column"])
+
+    def _reserve_padding(self, base: str, offset: int):
+        """
+        元ファクターの配列に offset 分のシフトを切り出せる余白を確保する。
+        余白が足りないキャッシュは捨て、次回の get_factor で作り直す。
+        """
+        top, bottom = self._factor_padding.get(base, (0, 0))
+        new_top, new_bottom = max(top, offset), max(bottom, -offset)
+        if (new_top, new_bottom) != (top, bottom):
+            self._factor_padding[base] = (new_top, new_bottom)
+            self._evict_factor(base)
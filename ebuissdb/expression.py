@@ -0,0 +1,210 @@
+import ast
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def _rank(values: pd.DataFrame) -> pd.DataFrame:
+    return values.rank(axis=1, pct=True)
+
+
+def _row_stats(values: np.ndarray):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全銘柄NaNの日付
+        return np.nanmean(values, axis=1, keepdims=True), np.nanstd(values, axis=1, ddof=1, keepdims=True)
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    mean, std = _row_stats(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(std > 0, (values - mean) / std, np.nan)
+
+
+def _demean(values: np.ndarray) -> np.ndarray:
+    mean, _ = _row_stats(values)
+    return values - mean
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    gross = np.nansum(np.abs(values), axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(gross > 0, values / gross, np.nan)
+
+
+def _log(values: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.log(values)
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    result = np.full(values.shape, np.nan)
+    if abs(periods) >= len(values):
+        return result
+    if periods >= 0:
+        result[periods:] = values[:len(values) - periods]
+    else:
+        result[:periods] = values[-periods:]
+    return result
+
+
+# 関数名 → (実装, DataFrameのまま渡すか)。日付ごとの横断面（銘柄方向）の計算は axis=1
+FUNCTIONS = {
+    "rank": (_rank, True),      # 日付ごとの順位（0〜1、同順位は平均）
+    "zscore": (_zscore, False),  # 日付ごとの標準化
+    "demean": (_demean, False),  # 日付ごとの平均を引く
+    "scale": (_scale, False),    # 日付ごとに絶対値の合計が1になるよう割る
+    "abs": (np.abs, False),
+    "sign": (np.sign, False),
+    "log": (_log, False),
+}
+
+_BINARY_OPS = {
+    ast.Add: ("add", np.add),
+    ast.Sub: ("sub", np.subtract),
+    ast.Mult: ("mul", np.multiply),
+    ast.Div: ("div", np.divide),
+    ast.Pow: ("pow", np.power),
+}
+_OPS = {name: func for name, func in _BINARY_OPS.values()}
+_ELEMENTWISE = {"abs", "sign", "log"}  # 定数にも適用できる（要素ごとの）関数
+_COMMUTATIVE = {"add", "mul"}
+_QUOTED_NAME = re.compile(r"`([^`]+)`")
+
+
+def parse_expression(expression: str, resolve_name) -> tuple:
+    """
+    ファクター式を、共通部分を共有できる正規化した木（タプルのネスト）に変換する。
+    使える演算は + - * / ** と単項の -、関数は FUNCTIONS のものと shift(式, 期数)。
+    Python の識別子として書けないファクター名は `名前` のようにバッククォートで囲む。
+    定数だけの部分式は定数に畳み込む（abs, sign, log は定数にも適用でき、横断面の関数と shift は ValueError）。
+
+    Parameters:
+        expression (str): ファクター式 例: "rank(a_mom) - 0.5*zscore(b_val_shifted1)"
+        resolve_name (callable): ファクター名 → 葉ノード（または展開した式の木）を返す関数
+
+    Returns:
+        tuple: ("factor", 名前) / ("const", 値) / ("neg", 子) / (演算名, 左, 右) / ("call", 関数名, 子) / ("shift", 子, 期数)
+    """
+    quoted = {}
+
+    def quote(match):
+        placeholder = f"__factor{len(quoted)}__"
+        quoted[placeholder] = match.group(1)
+        return placeholder
+
+    try:
+        tree = ast.parse(_QUOTED_NAME.sub(quote, expression).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"ファクター式を解釈できません: {expression} ({e.msg})") from None
+
+    def build(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return ("const", float(node.value))
+        if isinstance(node, ast.Name):
+            return resolve_name(quoted.get(node.id, node.id))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            child = build(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return child
+            return ("const", -child[1]) if child[0] == "const" else ("neg", child)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            op = _BINARY_OPS[type(node.op)][0]
+            left, right = build(node.left), build(node.right)
+            if left[0] == "const" and right[0] == "const":
+                return ("const", float(_OPS[op](left[1], right[1])))
+            if op in _COMMUTATIVE:
+                left, right = sorted([left, right], key=repr)  # a+b と b+a を同じノードにする
+            return (op, left, right)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name == "shift":
+                if len(node.args) != 2:
+                    raise ValueError("shift は shift(式, 期数) の形で指定してください。")
+                periods = build(node.args[1])
+                if periods[0] != "const" or periods[1] != int(periods[1]):
+                    raise ValueError("shift の期数は整数の定数で指定してください。")
+                child = build(node.args[0])
+                if child[0] == "const":
+                    raise ValueError(f"shift の対象にファクターが含まれていません: {ast.unparse(node)}")
+                return ("shift", child, int(periods[1]))
+            if name in FUNCTIONS:
+                if len(node.args) != 1:
+                    raise ValueError(f"{name} の引数は1つです。")
+                child = build(node.args[0])
+                if child[0] == "const":
+                    # 日付ごとの横断面の計算は定数には意味がないため、要素ごとの関数だけ計算しておく
+                    if name not in _ELEMENTWISE:
+                        raise ValueError(f"{name} の引数にファクターが含まれていません: {ast.unparse(node)}")
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        return ("const", float(FUNCTIONS[name][0](np.float64(child[1]))))
+                return ("call", name, child)
+            raise ValueError(f"未対応の関数です: {name}（使用できる関数: {sorted(FUNCTIONS) + ['shift']}）")
+        raise ValueError(f"ファクター式で使用できない構文です: {ast.unparse(node)}")
+
+    return build(tree.body)
+
+
+def _frame(values: np.ndarray, like: pd.DataFrame) -> pd.DataFrame:
+    values = np.asarray(values, dtype=float)
+    return pd.DataFrame(values, index=like.index, columns=like.columns, copy=False)
+
+
+def _binary(op: str, left, right):
+    # 日付・銘柄が異なるファクター同士は和集合にそろえる（欠けている部分はNaN）
+    if isinstance(left, pd.DataFrame) and isinstance(right, pd.DataFrame):
+        if not (left.index.equals(right.index) and left.columns.equals(right.columns)):
+            left, right = left.align(right, join="outer")
+    like = left if isinstance(left, pd.DataFrame) else right
+
+    values = [v.to_numpy(dtype=float) if isinstance(v, pd.DataFrame) else v for v in (left, right)]
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        return _frame(_OPS[op](*values), like)
+
+
+def evaluate_expression(node: tuple, get_factor, cache_get, cache_put):
+    """
+    parse_expression の木を評価する。葉以外の各ノードの結果は cache_put で保存し、
+    同じ部分式は（別の式の中に現れた場合も）cache_get から再利用する。
+
+    Parameters:
+        node (tuple): parse_expression の結果
+        get_factor (callable): ファクター名 → Wide形式DataFrame
+        cache_get (callable): ノードのキー → 保存済みの結果（なければNone）
+        cache_put (callable): (ノードのキー, 結果) を保存する
+
+    Returns:
+        pd.DataFrame or float: 評価結果（定数だけの式はfloat）
+    """
+    kind = node[0]
+    if kind == "const":
+        return node[1]
+    if kind == "factor":
+        return get_factor(node[1])
+
+    key = repr(node)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    if kind == "neg":
+        child = evaluate_expression(node[1], get_factor, cache_get, cache_put)
+        result = _frame(-child.to_numpy(dtype=float), child)
+    elif kind == "call":
+        func, pass_frame = FUNCTIONS[node[1]]
+        child = evaluate_expression(node[2], get_factor, cache_get, cache_put)
+        if pass_frame:
+            result = _frame(func(child).to_numpy(dtype=float), child)
+        else:
+            result = _frame(func(child.to_numpy(dtype=float)), child)
+    elif kind == "shift":
+        child = evaluate_expression(node[1], get_factor, cache_get, cache_put)
+        result = _frame(_shift(child.to_numpy(dtype=float), node[2]), child)
+    else:
+        left = evaluate_expression(node[1], get_factor, cache_get, cache_put)
+        right = evaluate_expression(node[2], get_factor, cache_get, cache_put)
+        result = _binary(kind, left, right)
+
+    cache_put(key, result)
+    return result
@@ -32,3 +32,306 @@ class Evaluator:
             }
 
         return pd.DataFrame(results).T  # index=segment, columns=metrics
+
+
+class OnlineEvaluator:
+    """
+    Evaluator と同じ指標を、trade_log 全体を保持せずに逐次更新で計算する。
+    累積資産・ピーク・最安値・最大ドローダウン・勝ち数・期間数と、標準偏差用の平均/偏差平方和（Welford法）だけを保持する。
+    ann.Std 以外は Evaluator と同じ順序で計算するため完全に一致し、ann.Std も浮動小数点誤差の範囲で一致する。
+    期間を分割して別々に更新した状態は merge で結合できる（結合後の指標は浮動小数点誤差の範囲で一致する）。
+    """
+    def __init__(self, strategy_name: str = "UnnamedStrategy"):
+        self.strategy_name = strategy_name
+        self.segments = ["buy_ret", "sell_ret", "neutral_ret", "long_short_ret"]
+
+        k = len(self.segments)
+        self.n = 0                          # 期間数（NaNを含む）
+        self.count = np.zeros(k)            # NaNでないリターンの数
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)               # 平均からの偏差平方和
+        self.wins = np.zeros(k)
+        self.equity = np.ones(k)
+        self.peak = np.full(k, -np.inf)
+        self.trough = np.full(k, np.inf)    # 累積資産の最小値（merge 用）
+        self.max_dd = np.zeros(k)
+
+    def _to_values(self, returns) -> np.ndarray:
+        if isinstance(returns, pd.DataFrame):
+            return returns[self.segments].to_numpy(dtype=float)
+        if isinstance(returns, (dict, pd.Series)):
+            return np.array([[returns[seg] for seg in self.segments]], dtype=float)
+
+        values = np.asarray(returns, dtype=float)
+        if values.ndim > 2 or values.shape[-1] != len(self.segments):
+            raise ValueError(f"リターンは (期間数, {len(self.segments)}) の形で指定してください: {values.shape}")
+        return values.reshape(-1, len(self.segments))
+
+    def _combine_moments(self, count_b: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray):
+        # 平均・偏差平方和をバッチ単位で合成する（Chanの並列アルゴリズム。1件ずつならWelford法と同じ）
+        total = self.count + count_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(total > 0, count_b / total, 0.0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * ratio
+        self.count = total
+
+    def update(self, returns):
+        """
+        新しい期間のリターンで状態を更新する。
+
+        Parameters:
+            returns: trade_log の新しい行（DataFrame, 1行でも複数行でも可）、
+                     1期間分のセグメント別リターン（dict / Series / 長さ4の配列）、
+                     または (期間数, 4) の配列（列順は segments）
+        """
+        ret = self._to_values(returns)
+        if len(ret) == 0:
+            return
+
+        # 累積資産・ピーク・ドローダウン（直前の値から順に計算して Evaluator の cumprod / cummax と一致させる）
+        growth = 1 + np.nan_to_num(ret, nan=0.0)
+        equity = np.cumprod(np.vstack([self.equity, growth]), axis=0)[1:]
+        peak = np.maximum.accumulate(np.vstack([self.peak, equity]), axis=0)[1:]
+        self.max_dd = np.minimum(self.max_dd, ((equity / peak) - 1).min(axis=0))
+        self.trough = np.minimum(self.trough, equity.min(axis=0))
+        self.equity = equity[-1]
+        self.peak = peak[-1]
+
+        self.n += len(ret)
+        self.wins += (ret > 0).sum(axis=0)
+
+        valid = ~np.isnan(ret)
+        count_b = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(count_b > 0, np.where(valid, ret, 0.0).sum(axis=0) / count_b, 0.0)
+        m2_b = (np.where(valid, ret - mean_b, 0.0) ** 2).sum(axis=0)
+        self._combine_moments(count_b, mean_b, m2_b)
+
+    def merge(self, other: "OnlineEvaluator") -> "OnlineEvaluator":
+        """
+        直後の期間を更新した別の OnlineEvaluator を結合する（self の期間 → other の期間の順）。
+
+        Parameters:
+            other (OnlineEvaluator): self の最終期間の次から始まる期間の状態
+
+        Returns:
+            OnlineEvaluator: 結合後の self
+        """
+        if other.segments != self.segments:
+            raise ValueError("セグメントが一致しない OnlineEvaluator は結合できません。")
+        if other.n == 0:
+            return self
+
+        # other の期間の資産は self の最終資産倍になる。
+        # 結合後のピークは max(self.peak, self.equity * other のピーク) なので、
+        # other の期間のドローダウンは「other 内のドローダウン」と「self.peak からの下落」の小さい方になる
+        scaled_trough = self.equity * other.trough
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dd_from_prev_peak = np.where(np.isfinite(self.peak), scaled_trough / self.peak - 1, 0.0)
+        self.max_dd = np.minimum.reduce([self.max_dd, other.max_dd, np.minimum(dd_from_prev_peak, 0.0)])
+        self.peak = np.maximum(self.peak, self.equity * other.peak)
+        self.trough = np.minimum(self.trough, scaled_trough)
+        self.equity = self.equity * other.equity
+
+        self.n += other.n
+        self.wins = self.wins + other.wins
+        self._combine_moments(other.count, other.mean, other.m2)
+        return self
+
+    @classmethod
+    def combine(cls, parts: list, strategy_name: str = None) -> "OnlineEvaluator":
+        """
+        期間順に並んだ複数の OnlineEvaluator を結合した新しい OnlineEvaluator を返す。
+
+        Parameters:
+            parts (list): 期間順の OnlineEvaluator のリスト
+            strategy_name (str, optional): 結合後の戦略名（未指定なら先頭の戦略名）
+
+        Returns:
+            OnlineEvaluator: 全期間の状態
+        """
+        if not parts:
+            raise ValueError("結合する OnlineEvaluator がありません。")
+        merged = cls(strategy_name or parts[0].strategy_name)
+        for part in parts:
+            merged.merge(part)
+        return merged
+
+    def evaluate(self) -> pd.DataFrame:
+        if self.n == 0:
+            raise ValueError("評価するリターンがありません。")
+
+        results = {}
+        for i, seg in enumerate(self.segments):
+            total_ret = self.equity[i] - 1
+            ann_ret = (1 + total_ret) ** (52 / self.n) - 1
+            ann_std = np.sqrt(self.m2[i] / (self.count[i] - 1)) * np.sqrt(52) if self.count[i] > 1 else np.nan
+            rr = ann_ret / ann_std if ann_std != 0 else np.nan
+            win_r = self.wins[i] / self.n
+            max_dd = self.max_dd[i]
+            calmar = ann_ret / abs(max_dd) if max_dd < 0 else np.nan
+
+            results[seg] = {
+                "cum.Ret": total_ret,
+                "ann.Ret": ann_ret,
+                "ann.Std": ann_std,
+                "R/R": rr,
+                "Win_R": win_r,
+                "Max_DD": max_dd,
+                "Calmar Ratio": calmar
+            }
+
+        return pd.DataFrame(results).T  # index=segment, columns=metrics
+
+
+class BatchEvaluator:
+    """
+    日付 × 戦略のリターン行列から、Evaluator と同じ指標を全戦略まとめてNumPyで計算する。
+    大量のバックテスト結果の比較・ランキング用。1列が Evaluator の1セグメントに相当する。
+    """
+    def __init__(self, returns: pd.DataFrame, periods=None, starts=None):
+        """
+        Parameters:
+            returns (pd.DataFrame): index=日付, columns=戦略 のリターン行列
+            periods (array-like, optional): 戦略ごとの期間数（未指定なら行数。長さの違う trade_log をまとめた場合に指定）
+            starts (array-like, optional): 戦略ごとの開始行（それより前の行はドローダウンの計算から除く）
+        """
+        self.returns = returns
+        self.values = returns.to_numpy(dtype=float)
+        n_cols = self.values.shape[1]
+        self.periods = np.asarray(np.full(n_cols, len(returns)) if periods is None else periods, dtype=float)
+        self.starts = np.zeros(n_cols, dtype=int) if starts is None else np.asarray(starts, dtype=int)
+
+    @classmethod
+    def from_trade_logs(cls, trade_logs, segment: str = "long_short_ret", key: str = "strategy") -> "BatchEvaluator":
+        """
+        複数の trade_log から BatchEvaluator を作成する。
+
+        Parameters:
+            trade_logs (dict or pd.DataFrame): 戦略名 → trade_log の辞書、または key 列で戦略を区別する縦積みの trade_log
+            segment (str): 評価するセグメント
+            key (str): 縦積みの場合に戦略を表す列名
+
+        Returns:
+            BatchEvaluator: 戦略ごとの期間数を保持した BatchEvaluator
+        """
+        if isinstance(trade_logs, dict):
+            stacked = pd.concat({name: log[["date", segment]] for name, log in trade_logs.items()}, names=[key]).reset_index(level=0)
+        else:
+            stacked = trade_logs
+        if stacked.duplicated([key, "date"]).any():
+            raise ValueError("同じ戦略に重複した日付があります。")
+
+        returns = stacked.pivot(index="date", columns=key, values=segment).sort_index()
+        grouped = stacked.groupby(key, sort=False)["date"]
+        periods = grouped.size().reindex(returns.columns).to_numpy()
+        starts = returns.index.searchsorted(grouped.min().reindex(returns.columns))
+        return cls(returns, periods=periods, starts=starts)
+
+    def _equity(self) -> np.ndarray:
+        return np.cumprod(1 + np.nan_to_num(self.values, nan=0.0), axis=0)
+
+    def _before_start(self) -> np.ndarray:
+        return np.arange(len(self.values))[:, None] < self.starts[None, :]
+
+    def evaluate(self) -> pd.DataFrame:
+        """
+        全戦略の評価指標を計算する。
+
+        Returns:
+            pd.DataFrame: index=戦略, columns=Evaluator と同じ指標
+        """
+        ret = self.values
+        if len(ret) == 0:
+            raise ValueError("評価するリターンがありません。")
+
+        equity = self._equity()
+        total_ret = equity[-1] - 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ann_ret = (1 + total_ret) ** (52 / self.periods) - 1
+
+            count = (~np.isnan(ret)).sum(axis=0)
+            mean = np.nansum(ret, axis=0) / count
+            var = np.nansum((ret - mean) ** 2, axis=0) / (count - 1)
+            ann_std = np.where(count > 1, np.sqrt(var), np.nan) * np.sqrt(52)
+
+            rr = np.where(ann_std != 0, ann_ret / ann_std, np.nan)
+            win_r = (ret > 0).sum(axis=0) / self.periods
+            # 開始前の行はピークに含めない（Evaluator では trade_log の先頭行からピークを取る）
+            before = self._before_start()
+            peak = np.maximum.accumulate(np.where(before, -np.inf, equity), axis=0)
+            max_dd = np.where(before, 0.0, (equity / peak) - 1).min(axis=0)
+            calmar = np.where(max_dd < 0, ann_ret / np.abs(max_dd), np.nan)
+
+        return pd.DataFrame({
+            "cum.Ret": total_ret,
+            "ann.Ret": ann_ret,
+            "ann.Std": ann_std,
+            "R/R": rr,
+            "Win_R": win_r,
+            "Max_DD": max_dd,
+            "Calmar Ratio": calmar
+        }, index=self.returns.columns)
+
+    def rank(self, metric: str = "R/R", ascending: bool = False) -> pd.DataFrame:
+        """
+        指定した指標で戦略を並べ替えた評価表を返す。
+        """
+        return self.evaluate().sort_values(metric, ascending=ascending)
+
+    def rolling_sharpe(self, window: int) -> pd.DataFrame:
+        """
+        直近 window 期間の R/R（年率リターン / 年率標準偏差）を、累積和・累積積の差分から O(n) で計算する。
+        各日付の値は、その日までの window 行だけを Evaluator で評価した R/R と一致する。
+
+        Parameters:
+            window (int): 期間数
+
+        Returns:
+            pd.DataFrame: index=日付, columns=戦略（先頭 window-1 行はNaN）
+        """
+        if window < 2:
+            raise ValueError("window は2以上を指定してください。")
+        ret = self.values
+        n_rows, n_cols = ret.shape
+        valid = ~np.isnan(ret)
+
+        # 累積資産と、列平均で中心化したリターンの累積和（桁落ちを抑える）
+        equity = np.vstack([np.ones((1, n_cols)), self._equity()])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            center = np.where(valid.any(axis=0), np.nansum(ret, axis=0) / valid.sum(axis=0), 0.0)
+        centered = np.where(valid, ret - center, 0.0)
+        zeros = np.zeros((1, n_cols))
+        s1 = np.vstack([zeros, np.cumsum(centered, axis=0)])
+        s2 = np.vstack([zeros, np.cumsum(centered ** 2, axis=0)])
+        cnt = np.vstack([zeros, np.cumsum(valid, axis=0)])
+
+        result = np.full((n_rows, n_cols), np.nan)
+        if n_rows >= window:
+            total_ret = equity[window:] / equity[:-window] - 1
+            count = cnt[window:] - cnt[:-window]
+            sum1 = s1[window:] - s1[:-window]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ann_ret = (1 + total_ret) ** (52 / window) - 1
+                var = np.maximum(s2[window:] - s2[:-window] - sum1 ** 2 / count, 0.0) / (count - 1)
+                ann_std = np.where(count > 1, np.sqrt(var), np.nan) * np.sqrt(52)
+                result[window - 1:] = np.where(ann_std != 0, ann_ret / ann_std, np.nan)
+
+        return pd.DataFrame(result, index=self.returns.index, columns=self.returns.columns)
+
+    def rolling_drawdown(self, window: int) -> pd.DataFrame:
+        """
+        直近 window 期間の資産の最大値からの下落率を計算する（ローリング最大値は pandas の O(n) 実装を使用）。
+
+        Parameters:
+            window (int): 期間数
+
+        Returns:
+            pd.DataFrame: index=日付, columns=戦略 の下落率（0以下）
+        """
+        before = self._before_start()
+        equity = pd.DataFrame(np.where(before, np.nan, self._equity()), index=self.returns.index, columns=self.returns.columns)
+        peak = equity.rolling(window, min_periods=1).max()
+        return equity / peak - 1
@@ -1,4 +1,5 @@
 from .hisuiframe import HisuiFrame
 from .hisuistore import HisuiDB
+from .hisuicompact import CompactPolicy
 
-__all__ = ["HisuiFrame", "HisuiDB"]
+__all__ = ["HisuiFrame", "HisuiDB", "CompactPolicy"]
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class CompactPolicy:
+    """
+    登録時にDataFrameをコンパクトなdtypeへ変換する方針。
+
+    Attributes:
+        float32_atol (float, optional): float64列の値をfloat32にしたときの最大絶対誤差がこれ以下なら変換する（Noneで無効）。
+            float32の相対誤差は値によらず約6e-8以下なので、判定は絶対誤差で行う。
+            既定の1e-6ではリターンやzスコアなど値の小さい列は変換され、価格など絶対値が大きい列（おおむね16超）はfloat64のまま残る
+        int8_positions (bool): 値が -1/0/1 だけの数値列（ポジションなど）をint8にする
+        categorize (bool): 文字列の列・インデックス（銘柄コード・日付文字列など）をcategoryにする
+        max_category_ratio (float): categoryにするのはユニーク数/行数がこの値以下の場合のみ
+    """
+    float32_atol: Optional[float] = 1e-6
+    int8_positions: bool = True
+    categorize: bool = True
+    max_category_ratio: float = 0.5
+
+
+def _is_string_like(dtype) -> bool:
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+def _float32_columns(values: np.ndarray, atol: float) -> np.ndarray:
+    """各列をfloat32にしたときの最大絶対誤差が atol 以下かどうか（列ごとのbool配列）。"""
+    with np.errstate(over="ignore", invalid="ignore"):
+        cast = values.astype(np.float32).astype(np.float64)
+        err = np.abs(cast - values)
+    # NaNは元からNaN同士なら誤差なし、float32で表せない値(inf化)は変換しない
+    err = np.where(np.isnan(values) & np.isnan(cast), 0.0, err)
+    err = np.where(np.isnan(err), np.inf, err)
+    return err.max(axis=0, initial=0.0) <= atol
+
+
+def _position_columns(values: np.ndarray) -> np.ndarray:
+    """各列の値が -1/0/1 だけかどうか（列ごとのbool配列）。"""
+    return ((values == -1) | (values == 0) | (values == 1)).all(axis=0)
+
+
+def _compact_index(index: pd.Index, policy: CompactPolicy) -> pd.Index:
+    if isinstance(index, pd.MultiIndex):
+        return index  # MultiIndexは各レベルが整数コード化済み
+
+    if policy.categorize and _is_string_like(index.dtype) and len(index) > 0:
+        if index.nunique() / len(index) <= policy.max_category_ratio:
+            return pd.CategoricalIndex(index, name=index.name)
+    return index
+
+
+def compact_frame(df: pd.DataFrame, policy: CompactPolicy) -> pd.DataFrame:
+    """
+    policy に従って列とインデックスをコンパクトなdtypeに変換したDataFrameを返す（元のDataFrameは変更しない）。
+    """
+    new_dtypes = {}
+
+    # 数値列はdtypeごとに2次元配列としてまとめて判定する
+    float_cols = [col for col, dtype in df.dtypes.items() if dtype == np.float64]
+    if float_cols:
+        values = df[float_cols].to_numpy()
+        is_position = _position_columns(values) if policy.int8_positions else np.zeros(len(float_cols), dtype=bool)
+        is_float32 = _float32_columns(values, policy.float32_atol) if policy.float32_atol is not None else np.zeros(len(float_cols), dtype=bool)
+        for col, pos, f32 in zip(float_cols, is_position, is_float32):
+            if pos:
+                new_dtypes[col] = np.int8
+            elif f32:
+                new_dtypes[col] = np.float32
+
+    if policy.int8_positions:
+        int_cols = [col for col, dtype in df.dtypes.items() if pd.api.types.is_integer_dtype(dtype) and dtype != np.int8]
+        if int_cols:
+            is_position = _position_columns(df[int_cols].to_numpy())
+            new_dtypes.update({col: np.int8 for col, pos in zip(int_cols, is_position) if pos})
+
+    if policy.categorize and len(df) > 0:
+        for col, dtype in df.dtypes.items():
+            if _is_string_like(dtype) and df[col].nunique() / len(df) <= policy.max_category_ratio:
+                new_dtypes[col] = "category"
+
+    compacted = df.astype(new_dtypes) if new_dtypes else df
+    index = _compact_index(df.index, policy)
+    if index is not df.index:
+        compacted = compacted.set_axis(index, axis=0)
+    return compacted
@@ -0,0 +1,91 @@
+import os
+import shutil
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# .npy として列指向で保存できるdtype（それ以外の列はpickleで保存する）
+_MMAP_KINDS = "biufcmM"
+
+
+def frame_dirname(name: str) -> str:
+    return quote(name, safe="")
+
+
+def _is_mmappable(dtype) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in _MMAP_KINDS and not dtype.hasobject
+
+
+def write_frame(df: pd.DataFrame, frame_dir: str) -> dict:
+    """
+    DataFrameを frame_dir に保存し、カタログに記録するレイアウト情報を返す。
+    数値列はdtypeごとに (列数, 行数) のC連続配列として .npy に保存するため、
+    読み込み時はそのままメモリマップしてpandasのブロックとして使える。
+
+    Returns:
+        dict: blocks（.npyファイル名と列位置）, other（pickle保存した列位置）
+    """
+    tmp_dir = frame_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    pd.to_pickle(df.index, os.path.join(tmp_dir, "index.pkl"))
+    pd.to_pickle(df.columns, os.path.join(tmp_dir, "columns.pkl"))
+
+    # dtypeごとに列位置をまとめる
+    groups = {}
+    other = []
+    for pos, dtype in enumerate(df.dtypes):
+        if _is_mmappable(dtype):
+            groups.setdefault(dtype.str, []).append(pos)
+        else:
+            other.append(pos)
+
+    blocks = []
+    for i, (dtype_str, positions) in enumerate(groups.items()):
+        file_name = f"block_{i}.npy"
+        values = np.ascontiguousarray(df.iloc[:, positions].to_numpy(dtype=np.dtype(dtype_str)).T)
+        np.save(os.path.join(tmp_dir, file_name), values, allow_pickle=False)
+        blocks.append({"file": file_name, "dtype": dtype_str, "positions": positions})
+
+    if other:
+        df.iloc[:, other].to_pickle(os.path.join(tmp_dir, "other.pkl"))
+
+    shutil.rmtree(frame_dir, ignore_errors=True)
+    os.replace(tmp_dir, frame_dir)
+
+    return {"blocks": blocks, "other": other}
+
+
+def read_frame(frame_dir: str, layout: dict) -> pd.DataFrame:
+    """
+    write_frame で保存したDataFrameを読み込む。
+    数値列はコピーオンライトでメモリマップするため、データ本体は必要になるまで読み込まれず、
+    同じファイルを開く複数プロセスはOSのページキャッシュを共有する。
+    書き込んだページだけがそのプロセスのメモリにコピーされ、ファイルは変更されない。
+    """
+    index = pd.read_pickle(os.path.join(frame_dir, "index.pkl"))
+    columns = pd.read_pickle(os.path.join(frame_dir, "columns.pkl"))
+
+    parts = []
+    for block in layout["blocks"]:
+        values = np.load(os.path.join(frame_dir, block["file"]), mmap_mode="c", allow_pickle=False)
+        parts.append((block["positions"], pd.DataFrame(values.T, index=index, copy=False)))
+
+    if layout["other"]:
+        other = pd.read_pickle(os.path.join(frame_dir, "other.pkl"))
+        parts.append((layout["other"], other.set_axis(index, axis=0)))
+
+    if len(parts) == 1 and parts[0][0] == list(range(len(columns))):
+        return parts[0][1].set_axis(columns, axis=1)
+    if not parts:
+        return pd.DataFrame(index=index, columns=columns)
+
+    # 複数dtypeの場合は元の列順に並べ直す
+    positions = [pos for part_positions, _ in parts for pos in part_positions]
+    df = pd.concat([part for _, part in parts], axis=1, ignore_index=True)
+    order = np.argsort(positions)
+    if not (order == np.arange(len(order))).all():
+        df = df.iloc[:, order]
+    return df.set_axis(columns, axis=1)
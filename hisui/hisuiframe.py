@@ -14,6 +14,8 @@ class HisuiFrame:
     index: List[str] = field(init=False)
     dtype_info: dict[str, str] = field(init=False)
     index_dtype_info: dict[str, str] = field(init=False)  # ★追加
+    memory_bytes: int = field(init=False)  # インデックスを含むdeepなメモリ使用量
+    index_memory_bytes: int = field(init=False)
 
     def __post_init__(self):
         self.columns = list(self.df.columns)
@@ -23,6 +25,9 @@ class HisuiFrame:
             name: str(self.df.index.get_level_values(name).dtype)
             for name in self.df.index.names if name is not None
         }
+        usage = self.df.memory_usage(index=True, deep=True)
+        self.memory_bytes = int(usage.sum())
+        self.index_memory_bytes = int(usage["Index"])
 
     def summary(self) -> str:
         return (
@@ -32,5 +37,6 @@ class HisuiFrame:
             f"- Columns: {self.columns}\n"
             f"- Index: {self.index}\n"
             f"- Dtypes: {self.dtype_info}\n"
+            f"- Memory: {self.memory_bytes / 1024 ** 2:.1f} MB\n"
             f"- Created at: {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
         )
@@ -0,0 +1,255 @@
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SUPPORTED_EXTENSIONS = [".parquet", ".csv", ".pkl", ".pickle"]
+
+
+def _date_values(values) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(values))
+
+
+def _date_bound(value, tz) -> pd.Timestamp:
+    # 期間の境界を日付列のタイムゾーンに合わせる（タイムゾーンなしの境界はその地域の時刻とみなす）
+    bound = pd.Timestamp(value)
+    if tz is None:
+        return bound if bound.tz is None else bound.tz_convert(None)
+    return bound.tz_localize(tz) if bound.tz is None else bound.tz_convert(tz)
+
+
+def filter_frame(df: pd.DataFrame, columns: list = None, start_date=None, end_date=None, tickers: list = None,
+                 date_col: str = "date", ticker_col: str = "ticker") -> pd.DataFrame:
+    """
+    DataFrameを列・期間・銘柄で絞り込む。
+    日付・銘柄は date_col / ticker_col という名前の列またはインデックスレベルから探し、
+    見つからない場合はWide形式（index=日付, columns=銘柄）とみなす。
+    columns を指定しても、date_col / ticker_col の列は（Long形式のキーとして）常に残す。
+    日付がタイムゾーン付きの場合、タイムゾーンなしの start_date / end_date はその地域の時刻とみなす。
+    """
+    mask = None
+
+    if start_date is not None or end_date is not None:
+        if date_col in df.columns:
+            dates = _date_values(df[date_col])
+        elif date_col in df.index.names:
+            dates = _date_values(df.index.get_level_values(date_col))
+        elif not isinstance(df.index, pd.MultiIndex):
+            dates = _date_values(df.index)
+        else:
+            raise KeyError(f"日付の列またはインデックス '{date_col}' が見つかりません。")
+
+        mask = np.ones(len(df), dtype=bool)
+        if start_date is not None:
+            mask &= dates >= _date_bound(start_date, dates.tz)
+        if end_date is not None:
+            mask &= dates <= _date_bound(end_date, dates.tz)
+
+    wide_tickers = None
+    if tickers is not None:
+        if ticker_col in df.columns:
+            ticker_mask = df[ticker_col].isin(tickers).to_numpy()
+        elif ticker_col in df.index.names:
+            ticker_mask = df.index.get_level_values(ticker_col).isin(tickers)
+        else:
+            ticker_mask = None
+            wide_tickers = [col for col in df.columns if col in set(tickers)]
+        if ticker_mask is not None:
+            mask = ticker_mask if mask is None else mask & ticker_mask
+
+    if mask is not None and not mask.all():
+        df = df[mask]
+    if wide_tickers is not None:
+        df = df[wide_tickers]
+    if columns is not None:
+        keep = set(columns) | {date_col, ticker_col}
+        df = df[[col for col in df.columns if col in keep]]
+    return df
+
+
+def _parquet_pushdown(filepath: str, columns: list, start_date, end_date, tickers: list, date_col: str, ticker_col: str):
+    """
+    parquetのスキーマを見て、pyarrowに渡す columns / filters を組み立てる。
+    pyarrowが使えない場合は何も絞り込まず、絞り込みは読み込み後に行う。
+
+    Returns:
+        (read_columns, filters, dates_done, tickers_done): 後ろ2つは読み込み時に絞り込み済みかどうか
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return columns, None, False, False
+
+    schema = pq.read_schema(filepath)
+    pandas_meta = schema.pandas_metadata or {}
+    index_cols = [col for col in pandas_meta.get("index_columns", []) if isinstance(col, str)]
+    data_cols = [col for col in schema.names if col not in index_cols]
+
+    # 日付列（Wide形式ならインデックス1列）が日付型のときだけ期間を読み込み時に絞り込む
+    date_field = date_col if date_col in schema.names else (index_cols[0] if len(index_cols) == 1 else None)
+    filters = []
+    dates_done = start_date is None and end_date is None
+    if not dates_done and date_field is not None:
+        field_type = schema.field(date_field).type
+        if pa.types.is_timestamp(field_type) or pa.types.is_date(field_type):
+            tz = field_type.tz if pa.types.is_timestamp(field_type) else None
+            if start_date is not None:
+                filters.append((date_field, ">=", _date_bound(start_date, tz)))
+            if end_date is not None:
+                filters.append((date_field, "<=", _date_bound(end_date, tz)))
+            dates_done = True
+
+    read_columns = columns
+    tickers_done = tickers is None
+    if not tickers_done:
+        if ticker_col in schema.names:
+            filters.append((ticker_col, "in", list(tickers)))
+        else:
+            # Wide形式：銘柄は列なので列の読み込みで絞り込む
+            wanted = set(tickers) if columns is None else set(tickers) & set(columns)
+            read_columns = [col for col in data_cols if col in wanted]
+        tickers_done = True
+
+    # 日付・銘柄の列はLong形式のキー（と読み込み後の絞り込み）に必要なため、読み込み対象に残す
+    if read_columns is not None:
+        read_columns = [col for col in data_cols if col in read_columns or col in (date_col, ticker_col)]
+
+    return read_columns, (filters or None), dates_done, tickers_done
+
+
+def _read_csv(filepath: str, columns: list, start_date, end_date, tickers: list, date_col: str, ticker_col: str, chunksize: int) -> pd.DataFrame:
+    """
+    CSVを chunksize 行ずつ読み、チャンクごとに絞り込んでから結合する。
+    """
+    header = pd.read_csv(filepath, index_col=0, nrows=0)
+    wide = ticker_col not in header.columns and ticker_col not in header.index.names
+    usecols = None
+    if columns is not None or (tickers is not None and wide):
+        wanted = set(header.columns)
+        if columns is not None:
+            wanted &= set(columns) | {date_col, ticker_col}
+        if tickers is not None and wide:
+            wanted &= set(tickers) | {date_col}
+        index_name = pd.read_csv(filepath, nrows=0).columns[0]
+        usecols = [index_name] + [col for col in header.columns if col in wanted]
+
+    chunks = [
+        filter_frame(chunk, columns=None, start_date=start_date, end_date=end_date, tickers=tickers,
+                     date_col=date_col, ticker_col=ticker_col)
+        for chunk in pd.read_csv(filepath, index_col=0, usecols=usecols, chunksize=chunksize)
+    ]
+    if not chunks:
+        return header
+    return pd.concat(chunks)
+
+
+def read_file(filepath: str, columns: list = None, start_date=None, end_date=None, tickers: list = None,
+              date_col: str = "date", ticker_col: str = "ticker", chunksize: int = 1_000_000) -> pd.DataFrame:
+    """
+    parquet / CSV / pickle ファイルを、必要な列・期間・銘柄だけ読み込む。
+    parquetは列と条件をpyarrowに渡して読み込み時に絞り込み、CSVはチャンクごとに絞り込む。
+    pickleは全体を読み込んでから絞り込む。
+
+    Parameters:
+        filepath (str): ファイルパス
+        columns (list, optional): 読み込む列（date_col / ticker_col の列は指定しなくても残す）
+        start_date, end_date (optional): 読み込む期間（両端を含む）
+        tickers (list, optional): 読み込む銘柄（ticker_col の列/インデックス、なければWide形式の列）
+        date_col (str): 日付の列名またはインデックス名
+        ticker_col (str): 銘柄の列名またはインデックス名
+        chunksize (int): CSVを読み込む行数の単位
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+
+    if ext == ".parquet":
+        read_columns, filters, dates_done, tickers_done = _parquet_pushdown(
+            filepath, columns, start_date, end_date, tickers, date_col, ticker_col
+        )
+        df = pd.read_parquet(filepath, columns=read_columns, filters=filters)
+    elif ext == ".csv":
+        df = _read_csv(filepath, columns, start_date, end_date, tickers, date_col, ticker_col, chunksize)
+        dates_done = tickers_done = True
+    elif ext in [".pkl", ".pickle"]:
+        df = pd.read_pickle(filepath)
+        dates_done = tickers_done = False
+    else:
+        raise ValueError(f"対応していないファイル形式: {ext}")
+
+    # 読み込み時に絞り込めなかった条件を適用する
+    return filter_frame(
+        df, columns=columns,
+        start_date=None if dates_done else start_date,
+        end_date=None if dates_done else end_date,
+        tickers=None if tickers_done else tickers,
+        date_col=date_col, ticker_col=ticker_col
+    )
+
+
+def resolve_paths(source) -> list:
+    """
+    ディレクトリ・globパターン・パスのリストから、対応形式のファイルパス一覧を返す。
+    """
+    sources = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+
+    paths = []
+    for src in sources:
+        src = os.fspath(src)
+        if os.path.isdir(src):
+            paths.extend(os.path.join(src, f) for f in os.listdir(src))
+        else:
+            paths.extend(glob.glob(src))
+
+    return sorted(p for p in set(paths) if os.path.isfile(p) and os.path.splitext(p)[1].lower() in SUPPORTED_EXTENSIONS)
+
+
+def read_files(paths: list, max_workers: int = None, **read_kwargs):
+    """
+    複数ファイルをスレッドプールで並行に読み込む（parquetのデコードはGILを解放するため並列に進む）。
+    データ名はファイル名（拡張子なし）とする。データ名が重複するファイル（a.parquet と a.csv、
+    別ディレクトリの同名ファイルなど）はどれを使うか決められないため、いずれも読み込まずにエラーとする。
+
+    Returns:
+        (frames, report): データ名 → DataFrame の辞書（成功分のみ）と、
+            ファイルごとの name, path, rows, cols, seconds, error を持つDataFrame
+    """
+    def read_one(path):
+        start = time.perf_counter()
+        try:
+            df = read_file(path, **read_kwargs)
+            return df, time.perf_counter() - start, None
+        except Exception as e:
+            return None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    counts = pd.Series(names, dtype=object).value_counts()
+    duplicated = set(counts[counts > 1].index)
+    targets = [path for path, name in zip(paths, names) if name not in duplicated]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(targets, executor.map(read_one, targets)))
+
+    frames = {}
+    records = []
+    for path, name in zip(paths, names):
+        if name in duplicated:
+            others = [other for other, other_name in zip(paths, names) if other_name == name]
+            df, seconds, error = None, 0.0, f"ValueError: データ名 '{name}' が重複しています: {others}"
+        else:
+            df, seconds, error = results[path]
+        if df is not None:
+            frames[name] = df
+        records.append({
+            "name": name,
+            "path": path,
+            "rows": df.shape[0] if df is not None else None,
+            "cols": df.shape[1] if df is not None else None,
+            "seconds": seconds,
+            "error": error,
+        })
+
+    report = pd.DataFrame(records, columns=["name", "path", "rows", "cols", "seconds", "error"])
+    return frames, report
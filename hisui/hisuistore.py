@@ -1,37 +1,231 @@
 from typing import Dict, List
+from datetime import datetime
 import pandas as pd
+import json
 import re
 import os
+import shutil
 
 from .hisuiframe import HisuiFrame
+from .hisuicompact import CompactPolicy, compact_frame
+from .hisuidisk import frame_dirname, read_frame, write_frame
+from .hisuiload import read_file, read_files, resolve_paths
+
+CATALOG_FILE = "catalog.json"
 
 
 class HisuiDB:
-    def __init__(self):
+    META_COLUMNS = [
+        "rows", "cols", "index_names", "index_dtypes", "column_names", "dtypes",
+        "memory_bytes", "index_memory_bytes", "description", "created_at"
+    ]
+
+    def __init__(self, compact_policy: CompactPolicy = None):
+        """
+        Parameters:
+            compact_policy (CompactPolicy, optional): 登録時に適用するdtype圧縮の方針（Noneなら圧縮しない）
+        """
+        self.compact_policy = compact_policy
         self._frames: Dict[str, HisuiFrame] = {}
-        self._meta_table: pd.DataFrame = pd.DataFrame()
+        self._meta_records: Dict[str, dict] = {}  # データ名 → メタ情報（登録・削除ごとに1件だけ更新）
+        self._meta_table = None  # datatable() のキャッシュ（変更があるとNoneに戻す）
+        self._simple_meta_table = None  # datatable_mini() のキャッシュ
+        self._store_path = None
+        self._stored_dfs: Dict[str, pd.DataFrame] = {}  # ストアと同じ内容のDataFrame（再保存を省略する）
+        self._chunks: Dict[str, List[pd.DataFrame]] = {}  # データ名 → append で追加し、まだ結合していない行
+        self._last_dates: Dict[str, pd.Timestamp] = {}  # データ名 → 登録済みの最終日付（append の重複確認用）
 
-    def _update_meta_table(self):
-        records = []
-        for name, frame in self._frames.items():
-            records.append({
-                "rows": frame.df.shape[0],
-                "cols": frame.df.shape[1],
-                "index_names": frame.index,
-                "index_dtypes": frame.index_dtype_info,
-                "column_names": frame.columns,
-                "dtypes": frame.dtype_info,
-                "description": frame.description,
-                "created_at": frame.created_at,
-            })
-        self._meta_table = pd.DataFrame(records, index=self._frames.keys())
+    @staticmethod
+    def _meta_record(frame: HisuiFrame) -> dict:
+        return {
+            "rows": frame.df.shape[0],
+            "cols": frame.df.shape[1],
+            "index_names": frame.index,
+            "index_dtypes": frame.index_dtype_info,
+            "column_names": frame.columns,
+            "dtypes": frame.dtype_info,
+            "memory_bytes": frame.memory_bytes,
+            "index_memory_bytes": frame.index_memory_bytes,
+            "description": frame.description,
+            "created_at": frame.created_at,
+        }
+
+    def _invalidate_meta_table(self):
+        self._meta_table = None
+        self._simple_meta_table = None
+
+    def _add_frame(self, frame: HisuiFrame):
+        self._frames[frame.name] = frame
+        self._meta_records[frame.name] = self._meta_record(frame)
+        self._chunks.pop(frame.name, None)
+        self._last_dates.pop(frame.name, None)
+        self._invalidate_meta_table()
+
+    def _compact(self, df: pd.DataFrame, compact) -> pd.DataFrame:
+        """
+        compact が CompactPolicy ならそれを、True ならデフォルトの方針を、None ならDBの compact_policy を適用する。
+        """
+        if compact is None:
+            compact = self.compact_policy
+        if compact is True:
+            compact = CompactPolicy()
+        return compact_frame(df, compact) if compact else df
 
-    def register(self, name: str, df: pd.DataFrame, description: str = "", overwrite: bool = True):
+    def register(self, name: str, df: pd.DataFrame, description: str = "", overwrite: bool = True, compact=None):
+        """
+        Parameters:
+            compact (CompactPolicy or bool, optional): dtype圧縮の方針（Trueでデフォルト方針、Falseで圧縮しない、NoneならDBの設定に従う）
+        """
         if name in self._frames and not overwrite:
             raise ValueError(f"'{name}' はすでに登録されています。上書きするには overwrite=True を指定してください。")
-        self._frames[name] = HisuiFrame(df=df, name=name, description=description)
-        self._update_meta_table()
-        self._simple_meta_table = self._meta_table[["description"]].copy()
+        self._add_frame(HisuiFrame(df=self._compact(df, compact), name=name, description=description))
+
+    def register_many(self, frames: Dict[str, pd.DataFrame], descriptions: Dict[str, str] = None, overwrite: bool = True, compact=None):
+        """
+        複数のDataFrameをまとめて登録する。
+        上書きの可否を先にすべて確認するため、エラー時は1件も登録されない。
+
+        Parameters:
+            frames (dict): データ名 → DataFrame
+            descriptions (dict, optional): データ名 → 説明
+            overwrite (bool): 登録済みのデータ名を上書きするか
+            compact (CompactPolicy or bool, optional): dtype圧縮の方針（register と同じ）
+        """
+        descriptions = descriptions or {}
+        if not overwrite:
+            duplicated = [name for name in frames if name in self._frames]
+            if duplicated:
+                raise ValueError(f"{duplicated} はすでに登録されています。上書きするには overwrite=True を指定してください。")
+
+        for name, df in frames.items():
+            frame = HisuiFrame(df=self._compact(df, compact), name=name, description=descriptions.get(name, ""))
+            self._frames[name] = frame
+            self._meta_records[name] = self._meta_record(frame)
+            self._chunks.pop(name, None)
+            self._last_dates.pop(name, None)
+        self._invalidate_meta_table()
+
+    @staticmethod
+    def _dates(df: pd.DataFrame):
+        """
+        行ごとの日付（MultiIndexなら date レベル、それ以外はインデックス）。日付でなければNone。
+        """
+        if isinstance(df.index, pd.MultiIndex):
+            if "date" not in df.index.names:
+                return None
+            values = df.index.get_level_values("date")
+        else:
+            values = df.index
+        if isinstance(values, pd.DatetimeIndex):
+            return values
+        try:
+            return pd.DatetimeIndex(pd.to_datetime(values))
+        except (ValueError, TypeError):
+            return None
+
+    def _last_date(self, name: str):
+        # 最初の append で登録済みデータから一度だけ求め、以降は追加した行から更新する
+        if name not in self._last_dates:
+            dates = self._dates(self._frames[name].df)
+            self._last_dates[name] = dates.max() if dates is not None and len(dates) else None
+        return self._last_dates[name]
+
+    def append(self, name: str, df: pd.DataFrame, overlap: str = "skip") -> pd.DataFrame:
+        """
+        登録済みデータの末尾に行を追加する（日次の追加データ用）。説明と作成日時は引き継ぐ。
+        追加した行は結合せずに保持し、get などで全体が必要になったときに1回だけ結合する
+        （追加1回あたりのコストは追加する行数だけで決まり、登録済みデータの量によらない）。
+
+        日付（インデックス、MultiIndexなら date レベル）が登録済みの最終日付以前の行は、既定では追加しない。
+        同じ日の追加処理を再実行しても、行が重複しない。
+
+        Parameters:
+            name (str): データ名
+            df (pd.DataFrame): 追加する行（登録済みデータと同じ列）
+            overlap (str): 登録済みの日付と重なる行の扱い（"skip": 追加しない, "error": ValueError）
+
+        Returns:
+            pd.DataFrame: 実際に追加した行
+        """
+        if overlap not in ("skip", "error"):
+            raise ValueError(f"overlap は 'skip' または 'error' を指定してください: {overlap}")
+        frame = self._frame_unmerged(name)
+
+        dates = self._dates(df)
+        last_date = self._last_date(name)
+        if dates is not None and last_date is not None:
+            new_rows = dates > last_date
+            if not new_rows.all():
+                if overlap == "error":
+                    raise ValueError(f"'{name}' の登録済みの最終日付 {last_date} 以前の行は追加できません。")
+                df = df[new_rows]
+        if df.empty:
+            return df
+        if dates is not None:
+            new_last = dates[dates > last_date].max() if last_date is not None else dates.max()
+            self._last_dates[name] = new_last
+
+        # 列とdtypeが同じならメタ情報は追加分だけ更新し、異なる場合はその場で結合して作り直す
+        self._chunks.setdefault(name, []).append(df)
+        if list(df.columns) != frame.columns or {col: str(dtype) for col, dtype in df.dtypes.items()} != frame.dtype_info:
+            self._merge_chunks(name)
+            return df
+
+        usage = df.memory_usage(index=True, deep=True)
+        record = self._meta_records[name]
+        record["rows"] += len(df)
+        record["memory_bytes"] += int(usage.sum())
+        record["index_memory_bytes"] += int(usage["Index"])
+        self._invalidate_meta_table()
+        return df
+
+    def _merge_chunks(self, name: str):
+        chunks = self._chunks.pop(name, None)
+        if not chunks:
+            return
+        frame = self._frames[name]
+        last_date = self._last_dates.get(name)
+        self._add_frame(HisuiFrame(df=pd.concat([frame.df] + chunks), name=name, description=frame.description, created_at=frame.created_at))
+        if last_date is not None:
+            self._last_dates[name] = last_date
+
+    def _frame_unmerged(self, name: str) -> HisuiFrame:
+        # append で追加した行を結合せずに、最後に結合した時点の HisuiFrame を返す
+        if name not in self._frames:
+            raise KeyError(f"'{name}' は登録されていません。")
+        return self._frames[name]
+
+    def get_after(self, name: str, date) -> pd.DataFrame:
+        """
+        日付が date より後の行だけを返す。append で追加した行のうち必要な分だけを読み、登録済みデータ全体は結合しない。
+        登録済みデータのインデックスが昇順のDatetimeIndexなら、二分探索で切り出す。
+
+        Parameters:
+            name (str): データ名
+            date: この日付より後の行を返す
+
+        Returns:
+            pd.DataFrame: 該当する行
+        """
+        frame = self._frame_unmerged(name)
+        date = pd.Timestamp(date)
+        parts = []
+        for chunk in reversed([frame.df] + self._chunks.get(name, [])):
+            dates = self._dates(chunk)
+            if dates is None:
+                raise ValueError(f"'{name}' のインデックスが日付ではありません。")
+            if isinstance(chunk.index, pd.DatetimeIndex) and chunk.index.is_monotonic_increasing:
+                start = chunk.index.searchsorted(date, side="right")
+                parts.append(chunk.iloc[start:])
+                if start > 0:
+                    break
+            else:
+                mask = dates > date
+                parts.append(chunk[mask])
+                if not mask.all():
+                    break
+        parts.reverse()
+        return parts[0] if len(parts) == 1 else pd.concat(parts)
 
     @property
     def datanames(self) -> List[str]:
@@ -42,6 +236,8 @@ class HisuiDB:
 
     def save_frames(self, names: List[str], path: str):
         os.makedirs(path, exist_ok=True)
+        for name in list(self._chunks):
+            self._merge_chunks(name)
 
         for name in names:
             if name not in self._frames:
@@ -51,28 +247,168 @@ class HisuiDB:
             file_path = os.path.join(path, f"{name}.parquet")
             df.to_parquet(file_path)
 
-    def load_file(self, filepath: str, name: str, description: str = "", overwrite: bool = True):
-        ext = os.path.splitext(filepath)[1].lower()
+    def save_store(self, path: str):
+        """
+        登録済みの全データを永続ストア（ディレクトリ）に保存する。
+        数値列はメモリマップ可能な .npy 形式で保存し、データ一覧は catalog.json に記録する。
+        同じストアから開いて変更していないデータは書き直さない。
 
-        if ext == ".parquet":
-            df = pd.read_parquet(filepath)
-        elif ext == ".csv":
-            df = pd.read_csv(filepath, index_col=0)  # index復元用
-        elif ext in [".pkl", ".pickle"]:
-            df = pd.read_pickle(filepath)
-        else:
-            raise ValueError(f"対応していないファイル形式: {ext}")
+        Parameters:
+            path (str): ストアのディレクトリ
+        """
+        path = os.path.abspath(path)
+        frames_dir = os.path.join(path, "frames")
+        os.makedirs(frames_dir, exist_ok=True)
+        for name in list(self._chunks):
+            self._merge_chunks(name)
+
+        same_store = path == self._store_path
+        old_catalog = self._read_catalog(path) if same_store else {"frames": {}}
+
+        catalog_frames = {}
+        for name, frame in self._frames.items():
+            dirname = frame_dirname(name)
+            if same_store and self._stored_dfs.get(name) is frame.df and name in old_catalog["frames"]:
+                layout = old_catalog["frames"][name]["layout"]
+            else:
+                layout = write_frame(frame.df, os.path.join(frames_dir, dirname))
+
+            catalog_frames[name] = {
+                "dir": dirname,
+                "description": frame.description,
+                "created_at": frame.created_at.isoformat(),
+                "layout": layout,
+            }
+
+        catalog = {"version": 1, "frames": catalog_frames, **self._catalog_extra()}
+        tmp_path = os.path.join(path, CATALOG_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(path, CATALOG_FILE))
+
+        # カタログに載っていない古いデータを削除
+        live_dirs = {entry["dir"] for entry in catalog_frames.values()}
+        for dirname in os.listdir(frames_dir):
+            if dirname not in live_dirs:
+                shutil.rmtree(os.path.join(frames_dir, dirname), ignore_errors=True)
+
+        self._store_path = path
+        self._stored_dfs = {name: frame.df for name, frame in self._frames.items()}
+
+    @classmethod
+    def open_store(cls, path: str, **kwargs):
+        """
+        save_store で保存したストアを開く。
+        数値列はコピーオンライトでメモリマップするため、データ量によらずすぐに開け、
+        同じストアを開く複数プロセスはメモリ上のデータを共有する。
+        取得したDataFrameはインメモリのDBと同様に変更でき、変更はストアのファイルには書き込まれない
+        （その場で変更したデータを保存する場合は、登録し直してから save_store すること）。
+
+        Parameters:
+            path (str): ストアのディレクトリ
+            **kwargs: DBクラスのコンストラクタに渡す引数
+
+        Returns:
+            開いたDB（呼び出したクラスのインスタンス）
+        """
+        path = os.path.abspath(path)
+        catalog = cls._read_catalog(path)
+
+        db = cls(**kwargs)
+        for name, entry in catalog["frames"].items():
+            df = read_frame(os.path.join(path, "frames", entry["dir"]), entry["layout"])
+            db._add_frame(HisuiFrame(
+                df=df, name=name, description=entry["description"],
+                created_at=datetime.fromisoformat(entry["created_at"])
+            ))
+
+        db._store_path = path
+        db._stored_dfs = {name: frame.df for name, frame in db._frames.items()}
+        db._restore_catalog_extra(catalog)
+        return db
 
-        self.register(name=name, df=df, description=description, overwrite=overwrite)
+    @staticmethod
+    def _read_catalog(path: str) -> dict:
+        catalog_path = os.path.join(path, CATALOG_FILE)
+        if not os.path.isfile(catalog_path):
+            raise FileNotFoundError(f"ストアのカタログが存在しません: {catalog_path}")
+        with open(catalog_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _catalog_extra(self) -> dict:
+        """サブクラスがカタログに追加で保存する情報。"""
+        return {}
+
+    def _restore_catalog_extra(self, catalog: dict):
+        """サブクラスがカタログから追加情報を復元する。"""
+        pass
+
+    def load_file(self, filepath: str, name: str, description: str = "", overwrite: bool = True, compact=None,
+                  columns: List[str] = None, start_date=None, end_date=None, tickers: List[str] = None,
+                  date_col: str = "date", ticker_col: str = "ticker", chunksize: int = 1_000_000):
+        """
+        ファイルを読み込んで登録する。列・期間・銘柄を指定すると、その範囲だけを読み込む
+        （parquetは読み込み時に絞り込み、CSVはchunksize行ずつ読みながら絞り込む）。
+
+        Parameters:
+            columns (list, optional): 読み込む列
+            start_date, end_date (optional): 読み込む期間（両端を含む）
+            tickers (list, optional): 読み込む銘柄（ticker_col の列/インデックス、なければWide形式の列）
+            date_col (str): 日付の列名またはインデックス名
+            ticker_col (str): 銘柄の列名またはインデックス名
+            chunksize (int): CSVを読み込む行数の単位
+        """
+        df = read_file(
+            filepath, columns=columns, start_date=start_date, end_date=end_date, tickers=tickers,
+            date_col=date_col, ticker_col=ticker_col, chunksize=chunksize
+        )
+        self.register(name=name, df=df, description=description, overwrite=overwrite, compact=compact)
+
+    def load_many(self, source, description: str = "", overwrite: bool = True, compact=None, max_workers: int = None, **read_kwargs) -> pd.DataFrame:
+        """
+        複数ファイルをスレッドプールで並行に読み込み、ファイル名（拡張子なし）をデータ名としてまとめて登録する。
+        読み込みに失敗したファイルは登録せず、結果の error 列に理由を記録する。
+
+        Parameters:
+            source (str or list): ディレクトリ、globパターン（例: "data/*.parquet"）、またはパスのリスト
+            max_workers (int, optional): 読み込みスレッド数
+            **read_kwargs: load_file と同じ絞り込み条件（columns, start_date, end_date, tickers など）
+
+        Returns:
+            pd.DataFrame: ファイルごとの name, path, rows, cols, seconds, error
+        """
+        frames, report = read_files(resolve_paths(source), max_workers=max_workers, **read_kwargs)
+        self.register_many(frames, descriptions={name: description for name in frames}, overwrite=overwrite, compact=compact)
+        return report
+
+    def load_dir(self, dirpath: str, pattern: str = "*", description: str = "", overwrite: bool = True, compact=None, **read_kwargs) -> List[str]:
+        """
+        ディレクトリ内の対応ファイルをすべて読み込み、ファイル名（拡張子なし）をデータ名としてまとめて登録する。
+        読み込みに失敗したファイルがあれば例外を送出する。
+
+        Parameters:
+            dirpath (str): ディレクトリ
+            pattern (str): 対象ファイルのglobパターン
+            **read_kwargs: load_file と同じ絞り込み条件（columns, start_date, end_date, tickers など）
+
+        Returns:
+            list: 登録したデータ名
+        """
+        frames, report = read_files(resolve_paths(os.path.join(dirpath, pattern)), **read_kwargs)
+        failed = report[report["error"].notna()]
+        if not failed.empty:
+            raise ValueError(f"読み込みに失敗したファイルがあります: {dict(zip(failed['path'], failed['error']))}")
+
+        self.register_many(frames, descriptions={name: description for name in frames}, overwrite=overwrite, compact=compact)
+        return list(frames.keys())
 
     def get(self, name: str) -> pd.DataFrame:
-        if name not in self._frames:
-            raise KeyError(f"'{name}' は登録されていません。")
-        return self._frames[name].df
+        return self.get_frame(name).df
 
     def get_frame(self, name: str) -> HisuiFrame:
         if name not in self._frames:
             raise KeyError(f"'{name}' は登録されていません。")
+        self._merge_chunks(name)
         return self._frames[name]
 
     def get_info(self, name: str) -> str:
@@ -86,7 +422,8 @@ class HisuiDB:
 
     def set_description(self, name: str, description: str):
         self.get_frame(name).description = description
-        self._update_meta_table()
+        self._meta_records[name]["description"] = description
+        self._invalidate_meta_table()
 
     def list_names(self) -> List[str]:
         return list(self._frames.keys())
@@ -95,7 +432,10 @@ class HisuiDB:
         if name not in self._frames:
             raise KeyError(f"'{name}' は登録されていません。")
         del self._frames[name]
-        self._update_meta_table()
+        del self._meta_records[name]
+        self._chunks.pop(name, None)
+        self._last_dates.pop(name, None)
+        self._invalidate_meta_table()
 
     def search(self, pattern: str) -> List[str]:
         return [name for name in self._frames if re.search(pattern, name)]
@@ -103,14 +443,26 @@ class HisuiDB:
     def summarize_all(self) -> str:
         if not self._frames:
             return "登録されたデータはありません。"
-        return "\n\n".join([frame.summary() for frame in self._frames.values()])
+        return "\n\n".join([self.get_frame(name).summary() for name in self.list_names()])
 
     def summarize(self, name: str) -> str:
         """指定されたデータの summary を返す（エイリアス）"""
         return self.get_info(name)
 
+    def total_memory_bytes(self) -> int:
+        """
+        登録済みの全データのdeepなメモリ使用量の合計（バイト）を返す。
+        """
+        return sum(record["memory_bytes"] for record in self._meta_records.values())
+
     def datatable(self) -> pd.DataFrame:
+        if self._meta_table is None:
+            self._meta_table = pd.DataFrame(
+                list(self._meta_records.values()), index=list(self._meta_records.keys()), columns=self.META_COLUMNS
+            )
         return self._meta_table.copy()
     
     def datatable_mini(self) -> pd.DataFrame:
+        if self._simple_meta_table is None:
+            self._simple_meta_table = self.datatable()[["description"]]
         return self._simple_meta_table.copy()
@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import ExitStack, contextmanager, nullcontext
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss の単位（Linux は KiB、macOS は byte）
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+# 現在の常駐メモリ（Linux の /proc/self/statm、ページ数）
+_STATM_PATH = "/proc/self/statm"
+_HAS_STATM = os.path.exists(_STATM_PATH)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if _HAS_STATM else 0
+
+
+def _max_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT if resource else 0
+
+
+def _current_rss():
+    if not _HAS_STATM:
+        return None
+    with open(_STATM_PATH, "rb") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+class Profiler:
+    """
+    処理の工程（stage）ごとに、経過時間・CPU時間・メモリを記録する。
+    1工程あたりのコストは時刻・rusage・常駐メモリの取得だけなので、常に有効にしておける。
+    メモリは既定では工程の前後の常駐メモリの差（rss_delta_bytes、工程が確保したまま残した量。Linuxのみ）と
+    プロセスの最大常駐メモリの増加（maxrss_growth_bytes）だけを記録する。
+    工程ごとのピーク確保量（peak_bytes）は trace_memory=True の場合だけ tracemalloc で計測する（処理は遅くなる）。
+
+    記録は直近 max_records 件だけ保持し、工程ごとの集計は件数に関係なく保持する。
+    add_callback / add_context で、各工程の記録を外部のメトリクス基盤へ送ることができる。
+    """
+    def __init__(self, trace_memory: bool = False, max_records: int = 10_000):
+        """
+        Parameters:
+            trace_memory (bool): tracemalloc で工程ごとのピーク確保量（peak_bytes）を計測するか（Falseなら peak_bytes は None）
+            max_records (int): 保持する記録の件数
+        """
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=max_records)
+        self._totals = {}
+        self._callbacks = []
+        self._contexts = []
+        self._run_id = 0
+        self._run_label = None
+        self._active_run = False
+        self._memory_stack = []
+
+    def add_callback(self, callback):
+        """
+        工程の終了ごとに callback(record: dict) を呼び出す。
+        """
+        self._callbacks.append(callback)
+
+    def add_context(self, factory):
+        """
+        各工程を factory(stage_name) が返すコンテキストマネージャで囲む（トレースのspanなど）。
+        """
+        self._contexts.append(factory)
+
+    @contextmanager
+    def run(self, label: str = None):
+        """
+        1回の実行（run_backtest など）に含まれる工程をまとめる。入れ子の場合は外側の実行にまとめる。
+        """
+        if self._active_run:
+            yield self
+            return
+
+        self._run_id += 1
+        self._run_label = label
+        self._active_run = True
+        try:
+            yield self
+        finally:
+            self._active_run = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        with ブロックを1つの工程として計測する。例外が発生した場合も ok=False として記録する。
+        """
+        with ExitStack() as stack:
+            for factory in self._contexts:
+                stack.enter_context(factory(name))
+
+            memory = self._enter_memory() if self.trace_memory else None
+            rss_start = _current_rss()
+            maxrss_start = _max_rss()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            ok = False
+            try:
+                yield
+                ok = True
+            finally:
+                wall = time.perf_counter() - wall_start
+                cpu = time.process_time() - cpu_start
+                record = {
+                    "run_id": self._run_id,
+                    "run": self._run_label,
+                    "stage": name,
+                    "wall_s": wall,
+                    "cpu_s": cpu,
+                    "peak_bytes": self._exit_memory(memory) if memory is not None else None,
+                    "rss_delta_bytes": _current_rss() - rss_start if rss_start is not None else None,
+                    "maxrss_growth_bytes": _max_rss() - maxrss_start,
+                    "ok": ok,
+                }
+                self._record(record)
+
+    def _enter_memory(self) -> list:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        # 入れ子の工程では、外側の工程のここまでのピークを退避してから内側用にリセットする
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]  # [開始時の確保量, 観測したピーク]
+        self._memory_stack.append(frame)
+        return frame
+
+    def _exit_memory(self, frame: list) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        frame[1] = max(frame[1], peak)
+        self._memory_stack.pop()
+        if self._memory_stack:
+            self._memory_stack[-1][1] = max(self._memory_stack[-1][1], frame[1])
+        return frame[1] - frame[0]
+
+    def _record(self, record: dict):
+        self.records.append(record)
+
+        total = self._totals.setdefault(record["stage"], {"count": 0, "errors": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0, "max_peak_bytes": None, "max_rss_delta_bytes": None})
+        total["count"] += 1
+        total["errors"] += not record["ok"]
+        total["wall_s"] += record["wall_s"]
+        total["cpu_s"] += record["cpu_s"]
+        total["max_wall_s"] = max(total["max_wall_s"], record["wall_s"])
+        if record["peak_bytes"] is not None:
+            total["max_peak_bytes"] = max(total["max_peak_bytes"] or 0, record["peak_bytes"])
+        if record["rss_delta_bytes"] is not None:
+            total["max_rss_delta_bytes"] = max(total["max_rss_delta_bytes"] or 0, record["rss_delta_bytes"])
+
+        for callback in self._callbacks:
+            callback(record)
+
+    def add_records(self, records: list):
+        """
+        別の Profiler（ワーカープロセスなど）の記録を取り込み、集計とフックに反映する。
+        取り込み元の実行（run_id）ごとに、このProfilerの新しい実行として番号を付け直す。
+
+        Parameters:
+            records (list): Profiler.records の各要素と同じ形式の dict のリスト
+        """
+        run_ids = {}
+        for record in records:
+            if record["run_id"] not in run_ids:
+                self._run_id += 1
+                run_ids[record["run_id"]] = self._run_id
+            self._record({**record, "run_id": run_ids[record["run_id"]]})
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        保持している記録を1工程1行のDataFrameで返す。
+        """
+        return pd.DataFrame(list(self.records))
+
+    def last_run(self) -> pd.DataFrame:
+        """
+        直近の実行（run）の記録を返す。
+        """
+        return pd.DataFrame([r for r in self.records if r["run_id"] == self._run_id])
+
+    def summary(self) -> pd.DataFrame:
+        """
+        これまでの全記録を工程ごとに集計する（件数・合計/平均/最大の経過時間・合計CPU時間・最大ピーク確保量・最大の常駐メモリ増加）。
+        """
+        summary = pd.DataFrame.from_dict(self._totals, orient="index")
+        if summary.empty:
+            return summary
+        summary["mean_wall_s"] = summary["wall_s"] / summary["count"]
+        summary.index.name = "stage"
+        return summary[["count", "errors", "wall_s", "mean_wall_s", "max_wall_s", "cpu_s", "max_peak_bytes", "max_rss_delta_bytes"]]
+
+    def reset(self):
+        """
+        記録と集計を破棄する（フックは残す）。
+        """
+        self.records.clear()
+        self._totals.clear()
+
+
+def profile_stage(profiler, name: str):
+    """
+    profiler が None なら何もしないコンテキストマネージャを返す。
+    """
+    return profiler.stage(name) if profiler is not None else nullcontext()
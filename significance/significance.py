@@ -0,0 +1,247 @@
+import math
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ..evaluator.evaluator import BatchEvaluator
+
+SEGMENTS = ["buy_ret", "sell_ret", "neutral_ret", "long_short_ret"]
+METRICS = ["cum.Ret", "ann.Ret", "ann.Std", "R/R", "Win_R", "Max_DD", "Calmar Ratio"]
+
+# 1試行・1要素（日付 × 銘柄）あたりの作業メモリ（乱数キー・並べ替え順・マスク・一時配列、バイト、見積もり用）
+_BYTES_PER_CELL = 40
+
+# ワーカープロセスごとの状態（ポジション・リターン・並べ替え対象）
+_worker_state = {}
+
+
+@dataclass
+class SignificanceResult:
+    """
+    resampling_test の結果。
+
+    Attributes:
+        table (pd.DataFrame): index=セグメント の Evaluator と同じ評価表に、指標ごとの p値と信頼区間の列を加えたもの
+        null_metrics (pd.DataFrame): 帰無分布の指標（index=試行, columns=(セグメント, 指標)）
+        bootstrap_metrics (pd.DataFrame): ブロック・ブートストラップの指標（index=試行, columns=(セグメント, 指標)）
+    """
+    table: pd.DataFrame
+    null_metrics: pd.DataFrame
+    bootstrap_metrics: pd.DataFrame
+
+
+def segment_means(pos: np.ndarray, ret: np.ndarray) -> np.ndarray:
+    """
+    ポジション（... × 日付 × 銘柄）から、日付ごとのセグメント別平均リターンを一括で計算する。
+    segment_returns の buy_ret / sell_ret / neutral_ret / long_short_ret と同じ値になる
+    （セグメント内にリターンがNaNの銘柄がある日付はNaN、銘柄がない日付もNaN）。
+
+    Parameters:
+        pos (np.ndarray): -1/0/1 のポジション（先頭に試行の次元があってもよい）
+        ret (np.ndarray): 日付 × 銘柄 の対数リターン
+
+    Returns:
+        np.ndarray: ... × 日付 × 4 のリターン（列は SEGMENTS の順）
+    """
+    missing = np.isnan(ret)
+    filled = np.where(missing, 0.0, ret)
+
+    def masked_mean(mask):
+        # マスクを0/1の行列にして、銘柄方向の和を内積で求める
+        weights = mask.astype(float)
+        count = weights.sum(axis=-1)
+        total = np.einsum("...tn,tn->...t", weights, filled)
+        if missing.any():
+            total[np.einsum("...tn,tn->...t", weights, missing.astype(float)) > 0] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan)
+
+    buy_ret = masked_mean(pos == 1)
+    sell_ret = masked_mean(pos == -1)
+    neutral_ret = masked_mean(pos == 0)
+    long_short_ret = np.nan_to_num(buy_ret - sell_ret, nan=0.0)
+    return np.stack([buy_ret, sell_ret, neutral_ret, long_short_ret], axis=-1)
+
+
+def _permutation_order(eligible: np.ndarray, seeds: list) -> np.ndarray:
+    # 対象銘柄は乱数キー（0〜1）、対象外は 2 + 列番号 のキーで並べ替える。
+    # 対象外の銘柄は常に末尾に元の順序で並ぶ
+    n_tickers = eligible.shape[1]
+    fixed = (2 + np.arange(n_tickers, dtype=np.float32))
+    keys = np.stack([np.random.default_rng(seed).random(eligible.shape, dtype=np.float32) for seed in seeds])
+    np.copyto(keys, np.broadcast_to(fixed, eligible.shape), where=~eligible)
+    return np.argsort(keys, axis=-1)
+
+
+def permute_positions(pos: np.ndarray, eligible: np.ndarray, seeds: list) -> np.ndarray:
+    """
+    日付ごとに、並べ替え対象の銘柄の間でポジションをランダムに入れ替える（横断面の順位をシャッフルするのと同じ）。
+    各日付のロング・ショートの銘柄数は変わらない。対象外の銘柄のポジションはそのまま残す。
+
+    Parameters:
+        pos (np.ndarray): 日付 × 銘柄 のポジション
+        eligible (np.ndarray): 日付 × 銘柄 の並べ替え対象（ファクターが有効な銘柄など）
+        seeds (list): 試行ごとの np.random.SeedSequence
+
+    Returns:
+        np.ndarray: 試行 × 日付 × 銘柄 のポジション
+    """
+    src = _permutation_order(eligible, seeds)
+    # 並べ替えたポジションを「対象銘柄を元の順序で並べた位置」に順番に書き戻す
+    dst = np.broadcast_to(np.argsort(~eligible, axis=-1, kind="stable"), src.shape)
+    permuted = np.empty(src.shape, dtype=pos.dtype)
+    np.put_along_axis(permuted, dst, np.take_along_axis(np.broadcast_to(pos, src.shape), src, axis=-1), axis=-1)
+    return permuted
+
+
+def block_bootstrap_indices(n_periods: int, block_size: int, seed) -> np.ndarray:
+    """
+    循環ブロック・ブートストラップの日付インデックス（長さ n_periods）を作成する。
+    ランダムな開始位置から block_size 日ずつ連続した日付を取り、末尾は先頭につなげる。
+    """
+    n_blocks = math.ceil(n_periods / block_size)
+    starts = np.random.default_rng(seed).integers(0, n_periods, size=n_blocks)
+    return ((starts[:, None] + np.arange(block_size)).ravel()[:n_periods]) % n_periods
+
+
+def _evaluate_batch(returns: np.ndarray) -> np.ndarray:
+    """
+    試行 × 日付 × セグメント のリターンを BatchEvaluator でまとめて評価し、試行 × セグメント × 指標 の配列を返す。
+    """
+    n_trials, n_periods, n_segments = returns.shape
+    columns = returns.transpose(1, 0, 2).reshape(n_periods, -1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        metrics = BatchEvaluator(pd.DataFrame(columns)).evaluate()
+    return metrics[METRICS].to_numpy().reshape(n_trials, n_segments, len(METRICS))
+
+
+def _init_worker(pos: np.ndarray, ret: np.ndarray, eligible: np.ndarray):
+    # セグメント平均は銘柄の順序によらないため、permute_positions のように元の列に書き戻さず、
+    # リターン側を「対象銘柄を元の順序で並べた順」にそろえておく
+    dst = np.argsort(~eligible, axis=-1, kind="stable")
+    _worker_state["pos"] = pos
+    _worker_state["ret"] = np.take_along_axis(ret, dst, axis=-1)
+    _worker_state["eligible"] = eligible
+
+
+def _permutation_batch(seeds: list) -> np.ndarray:
+    pos, ret, eligible = _worker_state["pos"], _worker_state["ret"], _worker_state["eligible"]
+    src = _permutation_order(eligible, seeds)
+    shuffled = np.take_along_axis(np.broadcast_to(pos, src.shape), src, axis=-1)
+    return _evaluate_batch(segment_means(shuffled, ret))
+
+
+def _run_permutations(pos: np.ndarray, ret: np.ndarray, eligible: np.ndarray, seeds: list, batch_size: int, max_workers: int) -> np.ndarray:
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+    if max_workers == 1:
+        _init_worker(pos, ret, eligible)
+        try:
+            results = [_permutation_batch(batch) for batch in batches]
+        finally:
+            _worker_state.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(pos, ret, eligible)) as executor:
+            results = list(executor.map(_permutation_batch, batches))
+    return np.concatenate(results)
+
+
+def _p_values(observed: np.ndarray, null: np.ndarray) -> np.ndarray:
+    """
+    片側（大きいほど良い）の p値 (1 + 帰無分布で観測値以上の数) / (1 + 帰無分布の有効な試行数)。
+    """
+    finite = np.isfinite(null)
+    exceed = (finite & (null >= observed)).sum(axis=0)
+    p = (1 + exceed) / (1 + finite.sum(axis=0))
+    return np.where(np.isfinite(observed), p, np.nan)
+
+
+def _metrics_frame(values: np.ndarray) -> pd.DataFrame:
+    columns = pd.MultiIndex.from_product([SEGMENTS, METRICS], names=["segment", "metric"])
+    return pd.DataFrame(values.reshape(len(values), -1), columns=columns)
+
+
+def resampling_test(pos: np.ndarray, ret: np.ndarray, eligible: np.ndarray = None, method: str = "permute",
+                    n_resamples: int = 1000, block_size: int = None, metrics: list = None, alpha: float = 0.05,
+                    seed: int = None, max_workers: int = None, memory_budget: int = 512 * 1024 ** 2) -> SignificanceResult:
+    """
+    バックテスト結果の評価指標について、リサンプリングによる p値と信頼区間を計算する。
+    各試行の指標は BatchEvaluator で全試行まとめて計算する（Evaluator と同じ定義）。
+
+    method="permute": 日付ごとにポジションを銘柄間で並べ替えた（横断面の順位をシャッフルした）N回の試行を帰無分布とする。
+        並べ替えは (試行 × 日付 × 銘柄) の配列でまとめて行い、memory_budget に収まる試行数ずつプロセスプールで並列に計算する。
+    method="bootstrap": 平均を0にしたセグメント別リターンを循環ブロック・ブートストラップした試行を帰無分布とする。
+    信頼区間はどちらの場合も、セグメント別リターンの循環ブロック・ブートストラップのパーセンタイル区間とする。
+
+    乱数は seed から np.random.SeedSequence.spawn で試行ごとに独立に作るため、
+    ワーカー数や一度に計算する試行数によらず同じ結果になる。
+
+    Parameters:
+        pos (np.ndarray): 日付 × 銘柄 のポジション（-1/0/1、NaNは0に補完済み）
+        ret (np.ndarray): 日付 × 銘柄 の対数リターン
+        eligible (np.ndarray, optional): 日付 × 銘柄 の並べ替え対象（未指定ならリターンが有効な銘柄）
+        method (str): 帰無分布の作り方（"permute" / "bootstrap"）
+        n_resamples (int): 試行回数
+        block_size (int, optional): ブートストラップのブロック長（未指定なら 日付数の1/3乗）
+        metrics (list, optional): p値・信頼区間を求める指標（未指定なら ann.Ret, R/R, Calmar Ratio）
+        alpha (float): 信頼区間の有意水準（0.05なら95%区間）
+        seed (int, optional): 乱数シード
+        max_workers (int, optional): method="permute" のワーカープロセス数（未指定ならCPU数、1ならプロセスを使わない）
+        memory_budget (int): 並べ替え1回分の作業用メモリの上限（バイト、目安）
+
+    Returns:
+        SignificanceResult: table, null_metrics, bootstrap_metrics
+    """
+    if method not in ("permute", "bootstrap"):
+        raise ValueError(f"method は 'permute' または 'bootstrap' を指定してください: {method}")
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples は1以上を指定してください: {n_resamples}")
+    metrics = metrics or ["ann.Ret", "R/R", "Calmar Ratio"]
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        raise KeyError(f"未対応の指標です: {unknown}（使用できる指標: {METRICS}）")
+
+    pos = np.asarray(pos)
+    ret = np.asarray(ret, dtype=float)
+    n_periods, n_tickers = ret.shape
+    if n_periods == 0:
+        raise ValueError("評価するリターンがありません。")
+    eligible = ~np.isnan(ret) if eligible is None else np.asarray(eligible, dtype=bool)
+    block_size = block_size or max(1, round(n_periods ** (1 / 3)))
+
+    observed_returns = segment_means(pos, ret)
+    observed = _evaluate_batch(observed_returns[None])[0]
+
+    permute_root, bootstrap_root = np.random.SeedSequence(seed).spawn(2)
+    bootstrap_seeds = bootstrap_root.spawn(n_resamples)
+    indices = np.stack([block_bootstrap_indices(n_periods, block_size, s) for s in bootstrap_seeds])
+    bootstrap = _evaluate_batch(observed_returns[indices])
+
+    if method == "permute":
+        batch_size = max(1, memory_budget // max(n_periods * n_tickers * _BYTES_PER_CELL, 1))
+        max_workers = max_workers or os.cpu_count() or 1
+        # 全ワーカーを使えるよう、1回に計算する試行数を抑える
+        batch_size = min(batch_size, math.ceil(n_resamples / max_workers))
+        null = _run_permutations(pos.astype(np.int8), ret, eligible, permute_root.spawn(n_resamples), batch_size, max_workers)
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 全日付NaNのセグメント
+            centered = observed_returns - np.nanmean(observed_returns, axis=0)
+        null = _evaluate_batch(centered[indices])
+
+    table = pd.DataFrame(observed, index=SEGMENTS, columns=METRICS)
+    p_values = _p_values(observed, null)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全試行NaNの指標
+        low, high = np.nanquantile(bootstrap, [alpha / 2, 1 - alpha / 2], axis=0)
+    for metric in metrics:
+        k = METRICS.index(metric)
+        table[f"{metric} p-value"] = p_values[:, k]
+        table[f"{metric} CI low"] = low[:, k]
+        table[f"{metric} CI high"] = high[:, k]
+
+    return SignificanceResult(table=table, null_metrics=_metrics_frame(null), bootstrap_metrics=_metrics_frame(bootstrap))
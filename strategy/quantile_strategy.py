@@ -1,7 +1,8 @@
 # strategies/quantile_strategy.py
 
 import pandas as pd
-from strategy import Strategy
+from ebuiss.strategy.strategy import Strategy
+from ebuiss.strategy.ranking import threshold_positions
 
 class QuantileLongShortStrategy(Strategy):
     """
@@ -16,17 +17,29 @@ class QuantileLongShortStrategy(Strategy):
         if factor_df is None:
             raise ValueError("factor_df is required for QuantileLongShortStrategy")
 
-        pos = pd.DataFrame(0, index=price_df.index, columns=price_df.columns)
+        # 全日付の分位点を一括で計算し、上位 quantile → ロング、下位 quantile → ショート
+        pos = threshold_positions(factor_df, lower_q=self.lower_q, upper_q=self.upper_q)
 
-        for date in factor_df.index:
-            if date not in price_df.index:
-                continue  # 念のため日付をそろえる
-
-            score = factor_df.loc[date]
-            q_low = score.quantile(self.lower_q)
-            q_high = score.quantile(self.upper_q)
-
-            pos.loc[date, score >= q_high] = 1   # 上位 quantile → ロング
-            pos.loc[date, score <= q_low] = -1  # 下位 quantile → ショート
+        # 価格データの日付・銘柄にそろえる（ファクターのない日付は中立）
+        pos = pos.reindex(index=price_df.index, columns=price_df.columns, fill_value=0)
 
         return pos
+
+    def describe(self) -> str:
+        return (
+            f"ファクター値が上位 {self.upper_q:.0%} 分位点以上の銘柄をロング、"
+            f"下位 {self.lower_q:.0%} 分位点以下の銘柄をショートとするロングショート戦略です。"
+        )
+
+    def get_metadata(self) -> dict:
+        return {
+            "name": "QuantileLongShortStrategy",
+            "description": self.describe(),
+            "params": {
+                "lower_q": self.lower_q,
+                "upper_q": self.upper_q
+            }
+        }
+
+    def get_name(self):
+        return self.name
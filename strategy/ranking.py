@@ -0,0 +1,120 @@
+from functools import lru_cache
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def _to_float_array(df: pd.DataFrame) -> np.ndarray:
+    return df.to_numpy(dtype=float, na_value=np.nan)
+
+
+def cross_sectional_rank(values: np.ndarray, ascending: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    日付 × 銘柄の行列を行ごとに順位付けする。
+    row.rank(method="first") と同じく、同値は出現順に順位を付け、NaNは順位なしとする。
+
+    Parameters:
+        values (np.ndarray): 日付 × 銘柄の2次元配列
+        ascending (bool): Trueなら値が小さいほど順位が小さい
+
+    Returns:
+        ranks (np.ndarray): 1始まりの順位（int32、NaNは0）
+        counts (np.ndarray): 各行の有効（非NaN）銘柄数
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    keys = values if ascending else -values
+
+    # NaNは昇順ソートで末尾に来るため、有効値だけが 1..n の順位を持つ
+    order = np.argsort(keys, axis=1, kind="stable")
+    ranks = np.empty(values.shape, dtype=np.int32)
+    seq = np.broadcast_to(np.arange(1, values.shape[1] + 1, dtype=np.int32), values.shape)
+    np.put_along_axis(ranks, order, seq, axis=1)
+    ranks[~valid] = 0
+
+    return ranks, valid.sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _qcut_table(n: int, n_quantiles: int) -> np.ndarray:
+    """
+    順位 1..n に対する pd.qcut(labels=False, duplicates="drop") の結果表（NaNは-1）。
+    qcutの分位点は有効銘柄数 n だけで決まるため、nごとに一度だけ計算する。
+    """
+    if n == 0:
+        return np.empty(0, dtype=np.int8)
+    ranks = pd.Series(np.arange(1, n + 1, dtype=float))
+    labels = pd.qcut(ranks, n_quantiles, labels=False, duplicates="drop")
+    return labels.fillna(-1).to_numpy(dtype=np.int8)
+
+
+def quantile_buckets(factor_df: pd.DataFrame, n_quantiles: int, ascending: bool = True) -> pd.DataFrame:
+    """
+    ファクターパネル全体を一括で分位に分類する。
+    各日付で qcut(row.rank(ascending=ascending, method="first"), n_quantiles, labels=False, duplicates="drop")
+    を行うのと同じ結果を返す。
+
+    Parameters:
+        factor_df (pd.DataFrame): index=date, columns=ticker のWide形式ファクター
+        n_quantiles (int): 分位数
+        ascending (bool): 順位付けの向き
+
+    Returns:
+        pd.DataFrame: 0始まりの分位番号（int8、ファクターがNaNの銘柄は-1）
+    """
+    if not 1 <= n_quantiles <= np.iinfo(np.int8).max:
+        raise ValueError(f"n_quantiles は 1〜{np.iinfo(np.int8).max} の範囲で指定してください: {n_quantiles}")
+
+    ranks, counts = cross_sectional_rank(_to_float_array(factor_df), ascending=ascending)
+    buckets = buckets_from_ranks(ranks, counts, n_quantiles)
+
+    return pd.DataFrame(buckets, index=factor_df.index, columns=factor_df.columns)
+
+
+def buckets_from_ranks(ranks: np.ndarray, counts: np.ndarray, n_quantiles: int) -> np.ndarray:
+    """
+    cross_sectional_rank の結果から、行ごとの qcut と同じ0始まりの分位番号（int8、順位なしは-1）を求める。
+    """
+    # 有効銘柄数ごとの結果表を連結し、(行のオフセット + 順位 - 1) で一括参照する
+    unique_counts, inverse = np.unique(counts, return_inverse=True)
+    tables = [_qcut_table(int(n), n_quantiles) for n in unique_counts]
+    offsets = np.concatenate([[0], np.cumsum([len(t) for t in tables])[:-1]]).astype(np.int64)
+    flat = np.concatenate(tables + [np.array([-1], dtype=np.int8)])
+
+    idx = offsets[inverse][:, None] + ranks - 1
+    idx[ranks == 0] = len(flat) - 1  # 欠損は末尾の-1を参照
+    return flat[idx]
+
+
+def quantile_positions(factor_df: pd.DataFrame, n_quantiles: int, long_quantile: int, short_quantile: int, ascending: bool = True) -> pd.DataFrame:
+    """
+    分位番号からポジション（1:ロング, -1:ショート, 0:中立）をint8で作成する。
+    long_quantile と short_quantile が同じ場合はショートを優先する。
+    """
+    buckets = quantile_buckets(factor_df, n_quantiles, ascending=ascending).to_numpy()
+
+    pos = np.zeros(buckets.shape, dtype=np.int8)
+    pos[buckets == long_quantile] = 1
+    pos[buckets == short_quantile] = -1
+
+    return pd.DataFrame(pos, index=factor_df.index, columns=factor_df.columns)
+
+
+def threshold_positions(factor_df: pd.DataFrame, lower_q: float, upper_q: float) -> pd.DataFrame:
+    """
+    各日付のファクター分位点（score.quantile と同じ線形補間）を閾値として、
+    上位をロング(1)、下位をショート(-1)とするint8のポジションを一括で作成する。
+    両方の条件を満たす場合はショートを優先する。
+    """
+    values = _to_float_array(factor_df)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全銘柄NaNの日付
+        q_low, q_high = np.nanquantile(values, [lower_q, upper_q], axis=1)
+
+    pos = np.zeros(values.shape, dtype=np.int8)
+    pos[values >= q_high[:, None]] = 1
+    pos[values <= q_low[:, None]] = -1
+
+    return pd.DataFrame(pos, index=factor_df.index, columns=factor_df.columns)
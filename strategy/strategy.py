@@ -14,6 +14,8 @@ class Strategy(ABC):
     def generate_positions(self, stock_df : pd.DataFrame,factor_df: pd.DataFrame = None) -> pd.DataFrame:
         """
         各週の日付 × 銘柄のポジション（1:ロング, -1:ショート, 0:中立）を返す。
+        連続値のウェイト（資産に対する保有額の比率）を返してもよく、その場合は Backtester の "weights" エンジンで評価する
+        （Ebuiss の engine="auto" では -1/0/1 以外の値を含むと自動で "weights" になる）。
         """
         pass
 
@@ -1,5 +1,6 @@
 import pandas as pd
 from ebuiss.strategy.strategy import Strategy
+from ebuiss.strategy.ranking import quantile_positions
 
 class test_strategy_5q(Strategy):
     """
@@ -13,17 +14,14 @@ class test_strategy_5q(Strategy):
         self.ascending = ascending  # Trueならファクターが小さいほど良いとみなす
 
     def generate_positions(self, stock_df : pd.DataFrame,factor_df: pd.DataFrame = None) -> pd.DataFrame:
-        positions = pd.DataFrame(index=factor_df.index, columns=factor_df.columns)
-
-        for date, row in factor_df.iterrows():
-            ranked = row.rank(ascending=self.ascending, method="first")
-            quantile_bins = pd.qcut(ranked, self.n_quantiles, labels=False, duplicates="drop")
-
-            pos = pd.Series(0, index=row.index)
-            pos[quantile_bins == self.long_quantile] = 1
-            pos[quantile_bins == self.short_quantile] = -1
-
-            positions.loc[date] = pos
+        # 全日付を一括で分位分類（日付ごとの qcut(row.rank(method="first")) と同じ結果）
+        positions = quantile_positions(
+            factor_df,
+            n_quantiles=self.n_quantiles,
+            long_quantile=self.long_quantile,
+            short_quantile=self.short_quantile,
+            ascending=self.ascending,
+        )
 
         return positions
     
@@ -1,5 +1,6 @@
 # ファイル例: Ebuiss_admin/strategy_driver.py
 
+import hashlib
 import importlib.util
 import shutil
 import os
@@ -18,21 +19,52 @@ class StrategyDriver:
 
         os.makedirs(self.strategy_dir, exist_ok=True)
 
-    def load_strategy(self, strategy_name: str):
+        # 戦略ファイルのパス → (mtime, サイズ, 内容のハッシュ, クラス)
+        self._class_cache = {}
+
+    def __getstate__(self):
+        # 動的にロードしたクラスはpickleできないため、ワーカープロセスへはキャッシュを渡さない
+        state = self.__dict__.copy()
+        state["_class_cache"] = {}
+        return state
+
+    def load_strategy(self, strategy_name: str, **kwargs):
         """
         戦略ファイルからクラスをロードしインスタンス化する。
+        ロードしたクラスはファイルが変更されるまで再利用し、インスタンスだけを kwargs で作り直す。
 
         Parameters:
             strategy_name (str): 戦略クラス名（ファイル名とクラス名が一致する前提）
+            **kwargs: 戦略クラスのコンストラクタに渡す引数
 
         Returns:
             Strategyクラスのインスタンス
         """
+        cls = self._load_strategy_class(strategy_name)
+        instance = cls(**kwargs)
+        return instance
+
+    def _load_strategy_class(self, strategy_name: str):
+        """
+        戦略クラスを返す。ファイルが前回のロードから変更されていなければキャッシュしたクラスを再利用する。
+        mtime・サイズが変わった場合だけ内容のハッシュを比較し、内容も変わっていればモジュールを再実行する。
+        """
         strategy_path = os.path.join(self.strategy_dir, f"{strategy_name}.py")
 
         if not os.path.isfile(strategy_path):
             raise FileNotFoundError(f"指定された戦略ファイルが存在しません: {strategy_path}")
 
+        stat = os.stat(strategy_path)
+        cached = self._class_cache.get(strategy_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[3]
+
+        with open(strategy_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if cached is not None and cached[2] == digest:
+            self._class_cache[strategy_path] = (stat.st_mtime_ns, stat.st_size, digest, cached[3])
+            return cached[3]
+
         module_name = strategy_name
         spec = importlib.util.spec_from_file_location(module_name, strategy_path)
 
@@ -46,8 +78,14 @@ class StrategyDriver:
             raise AttributeError(f"クラス {strategy_name} が {strategy_path} に存在しません。")
 
         cls = getattr(module, strategy_name)
-        instance = cls()
-        return instance
+        self._class_cache[strategy_path] = (stat.st_mtime_ns, stat.st_size, digest, cls)
+        return cls
+
+    def clear_cache(self):
+        """
+        ロード済みの戦略クラスのキャッシュを破棄する。
+        """
+        self._class_cache.clear()
 
     def register_strategy(self, file_path: str, strategy_name: str):
         """
@@ -59,6 +97,7 @@ class StrategyDriver:
             raise FileNotFoundError(f"指定されたコピー元ファイルが存在しません: {file_path}")
 
         shutil.copy(str(file_path), destination_path)
+        self._class_cache.pop(destination_path, None)
 
     def list_available_strategies(self) -> pd.DataFrame:
         """
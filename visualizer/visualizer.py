@@ -1,5 +1,125 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+
+
+SEGMENTS = ["buy_ret", "sell_ret", "neutral_ret", "long_short_ret"]
+
+
+def _endpoint_indices(n: int, n_out: int) -> np.ndarray:
+    # 間引きに必要な点数が取れない場合は、先頭・末尾だけを n_out 点以内で残す
+    return np.unique([0, n - 1])[:max(n_out, 0)] if n > 0 else np.arange(0)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets で、形を保ったまま n_out 点に間引くための位置を返す。
+
+    Parameters:
+        x (np.ndarray): x座標（昇順の数値）
+        y (np.ndarray): y座標（NaNなし）
+        n_out (int): 間引き後の点数（元の点数以上なら間引かない、3未満なら先頭・末尾だけ残す）
+
+    Returns:
+        np.ndarray: 残す点の位置（先頭・末尾を含む昇順）
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return _endpoint_indices(n, n_out)
+
+    # 先頭・末尾以外を n_out-2 個のバケットに分ける（末尾に最終点だけのバケットを追加）
+    every = (n - 2) / (n_out - 2)
+    edges = np.append(np.floor(np.arange(n_out - 1) * every).astype(int) + 1, n)
+
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2]
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        # 直前に選んだ点・次のバケットの平均点と作る三角形の面積が最大の点を選ぶ
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    n_out/2 個のバケットごとに最小値と最大値の点を残して間引くための位置を返す（急な上下を必ず残す）。
+
+    Parameters:
+        y (np.ndarray): y座標（NaNなし）
+        n_out (int): 間引き後の最大点数（4未満なら先頭・末尾だけ残す）
+
+    Returns:
+        np.ndarray: 残す点の位置（先頭・末尾を含む昇順）
+    """
+    n = len(y)
+    n_buckets = (n_out - 2) // 2  # 先頭・末尾の2点を含めて n_out 点以下
+    if n_out >= n:
+        return np.arange(n)
+    if n_buckets < 1:
+        return _endpoint_indices(n, n_out)
+
+    bucket = np.arange(n) * n_buckets // n
+    # バケット番号・値の順に並べると、各バケットの先頭が最小値、末尾が最大値になる
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([[0, n - 1], order[starts], order[ends]]))
+
+
+def downsample(x, y, max_points: int, method: str = "lttb"):
+    """
+    1系列を max_points 点以下に間引く。NaNの点は除く。
+
+    Parameters:
+        x (array-like): x座標（日付または数値）
+        y (array-like): y座標
+        max_points (int): 最大点数
+        method (str): "lttb" または "minmax"
+
+    Returns:
+        (np.ndarray, np.ndarray): 間引き後の x, y
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+
+    if method == "lttb":
+        x_num = x.astype("datetime64[ns]").astype(np.int64).astype(float) if np.issubdtype(x.dtype, np.datetime64) else x.astype(float)
+        indices = lttb_indices(x_num, y, max_points)
+    elif method == "minmax":
+        indices = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"未対応の間引き方法です: {method}（lttb, minmax のいずれか）")
+    return x[indices], y[indices]
+
+
+def _segment_values(trade_log: pd.DataFrame, segment: str, cumulative: bool) -> np.ndarray:
+    ret = trade_log[segment].to_numpy(dtype=float)
+    return np.cumsum(np.nan_to_num(ret, nan=0.0)) if cumulative else ret
+
+
+def _apply_layout(fig, title: str):
+    fig.update_layout(
+        title=title,
+        xaxis=dict(
+            tickformat="%Y-%m",
+            tickangle=0
+        )
+    )
+    return fig
 
 
 class Visualizer:
@@ -7,14 +127,27 @@ class Visualizer:
         self.trade_log = trade_log
         self.strategy_name = strategy_name
 
-    def plot_equity_segments(self, cumulative: bool = True):
+    def plot_equity_segments(self, cumulative: bool = True, max_points: int = None, method: str = "lttb"):
         """
         セグメント（buy_ret, sell_ret, etc.）の累積推移を可視化する。
         Plotly形式に変換して描画。
+
+        Parameters:
+            cumulative (bool): 累積表示するか
+            max_points (int, optional): 指定した場合、各セグメントをこの点数以下に間引き、WebGL（Scattergl）で描画する
+            method (str): 間引き方法（"lttb" または "minmax"）
         """
+        if max_points is not None:
+            dates = pd.to_datetime(self.trade_log["date"]).to_numpy()
+            fig = go.Figure()
+            for seg in SEGMENTS:
+                x, y = downsample(dates, _segment_values(self.trade_log, seg, cumulative), max_points, method=method)
+                fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=seg))
+            return _apply_layout(fig, f"{self.strategy_name} - Segment Performance")
+
         df = self.trade_log.copy()
         df["datetime"] = pd.to_datetime(df["date"])
-        melted = df.melt(id_vars="datetime", value_vars=["buy_ret", "sell_ret", "neutral_ret", "long_short_ret"],
+        melted = df.melt(id_vars="datetime", value_vars=SEGMENTS,
                         var_name="segment", value_name="ret")
 
         if cumulative:
@@ -35,9 +168,39 @@ class Visualizer:
         fig.update_layout(
             xaxis=dict(
                 tickformat="%Y-%m",
-                tickangle=0 
+                tickangle=0
             )
         )
 
         return fig
 
+    @staticmethod
+    def plot_comparison(trade_logs: dict, segment: str = "long_short_ret", cumulative: bool = True,
+                        max_points: int = 20_000, method: str = "lttb", title: str = "Strategy Comparison"):
+        """
+        複数のバックテスト結果の1セグメントを1つのチャートに重ねて描画する。
+        全系列の合計点数が max_points 以下になるように各系列を間引き、WebGL（Scattergl）で描画する。
+
+        Parameters:
+            trade_logs (dict): 戦略名 → trade_log
+            segment (str): 描画するセグメント
+            cumulative (bool): 累積表示するか
+            max_points (int): 全系列の合計の最大点数（各系列に2点以上割り当てられない場合は ValueError）
+            method (str): 間引き方法（"lttb" または "minmax"）
+            title (str): チャートのタイトル
+
+        Returns:
+            go.Figure: チャート
+        """
+        if not trade_logs:
+            raise ValueError("描画する trade_log がありません。")
+        per_series = max_points // len(trade_logs)
+        if per_series < 2:
+            raise ValueError(f"max_points={max_points} では {len(trade_logs)} 系列を描画できません（1系列あたり2点以上必要）。")
+
+        fig = go.Figure()
+        for name, trade_log in trade_logs.items():
+            dates = pd.to_datetime(trade_log["date"]).to_numpy()
+            x, y = downsample(dates, _segment_values(trade_log, segment, cumulative), per_series, method=method)
+            fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=str(name)))
+        return _apply_layout(fig, f"{title} - {segment}")